@@ -0,0 +1,172 @@
+"""
+Narration preparation for the YouTube Shorts Bot.
+The voice track is decoded to PCM once; silence trimming, loudness
+normalization and fades are applied to the array with NumPy, and the result
+is encoded to AAC once so the muxer can copy it without touching it again.
+"""
+
+import subprocess
+
+import numpy as np
+
+import config
+import telemetry
+from utils import get_ffmpeg_exe
+
+SAMPLE_RATE = 48000  # The K-weighting coefficients below are defined at 48 kHz
+
+# ITU-R BS.1770 K-weighting: (b, a) for the high-shelf "head" filter, then the RLB high-pass
+K_WEIGHTING = (
+    ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585)),
+    ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621))
+)
+BLOCK_SECONDS = 0.4  # Gating block length
+BLOCK_STEP_SECONDS = 0.1  # 75% overlap between blocks
+BLOCKS_PER_BATCH = 64  # Blocks transformed per FFT call, bounding memory
+ABSOLUTE_GATE = -70.0  # LUFS
+RELATIVE_GATE = -10.0  # LU below the absolute-gated loudness
+SILENCE_WINDOW_SECONDS = 0.01
+
+def decode_pcm(audio_path: str) -> np.ndarray:
+    """Decode any audio file to mono float32 samples at SAMPLE_RATE"""
+    result = subprocess.run(
+        [get_ffmpeg_exe(), '-v', 'error', '-i', audio_path,
+         '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32).copy()
+
+def encode_aac(samples: np.ndarray, output_path: str) -> str:
+    """Encode mono float32 samples to AAC in one pass"""
+    subprocess.run(
+        [get_ffmpeg_exe(), '-y', '-v', 'error',
+         '-f', 'f32le', '-ar', str(SAMPLE_RATE), '-ac', '1', '-i', 'pipe:0',
+         '-c:a', 'aac', '-b:a', config.AUDIO_BITRATE, output_path],
+        input=np.clip(samples, -1.0, 1.0).astype(np.float32).tobytes(),
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    return output_path
+
+def trim_silence(samples: np.ndarray, threshold_db: float = None, padding: float = None) -> tuple:
+    """Cut leading and trailing silence; returns (samples, seconds trimmed from the start)"""
+    threshold_db = config.AUDIO_SILENCE_DB if threshold_db is None else threshold_db
+    padding = config.AUDIO_SILENCE_PADDING if padding is None else padding
+
+    window = int(SILENCE_WINDOW_SECONDS * SAMPLE_RATE)
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        return samples, 0.0
+    rms = np.sqrt(np.mean(samples[:n_windows * window].reshape(n_windows, window) ** 2, axis=1))
+    loud = np.flatnonzero(rms > 10 ** (threshold_db / 20))
+    if loud.size == 0:
+        return samples, 0.0
+
+    pad = int(padding * SAMPLE_RATE)
+    start = max(loud[0] * window - pad, 0)
+    end = min((loud[-1] + 1) * window + pad, len(samples))
+    return samples[start:end], start / SAMPLE_RATE
+
+def k_weighting_power(n_fft: int) -> np.ndarray:
+    """|H|^2 of the K-weighting filters at the rfft bins of an n_fft transform"""
+    z = np.exp(-2j * np.pi * np.arange(n_fft // 2 + 1) / n_fft)  # z^-1 on the unit circle
+    power = np.ones(n_fft // 2 + 1)
+    for b, a in K_WEIGHTING:
+        response = (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+        power *= np.abs(response) ** 2
+    return power
+
+def integrated_loudness(samples: np.ndarray) -> float:
+    """Gated integrated loudness of mono 48 kHz audio in LUFS (ITU-R BS.1770)
+
+    Blocks are K-weighted in the frequency domain, many at a time, and their
+    mean square taken with Parseval's theorem. This ignores filter transients
+    at block edges, which is well within what normalization needs.
+    """
+    block = int(BLOCK_SECONDS * SAMPLE_RATE)
+    step = int(BLOCK_STEP_SECONDS * SAMPLE_RATE)
+    if len(samples) < block:
+        samples = np.pad(samples, (0, block - len(samples)))
+
+    # rfft bins other than DC and Nyquist stand for two bins of the full spectrum
+    weights = np.full(block // 2 + 1, 2.0)
+    weights[0] = 1.0
+    if block % 2 == 0:
+        weights[-1] = 1.0
+    weights *= k_weighting_power(block) / block ** 2
+
+    blocks = np.lib.stride_tricks.sliding_window_view(samples, block)[::step]
+    power = np.concatenate([
+        (np.abs(np.fft.rfft(blocks[i:i + BLOCKS_PER_BATCH], axis=1)) ** 2) @ weights
+        for i in range(0, len(blocks), BLOCKS_PER_BATCH)
+    ])
+
+    loudness = -0.691 + 10 * np.log10(np.maximum(power, 1e-12))
+    above_absolute = loudness > ABSOLUTE_GATE
+    if not above_absolute.any():
+        return float('-inf')
+    relative_gate = -0.691 + 10 * np.log10(power[above_absolute].mean()) + RELATIVE_GATE
+    gated = power[above_absolute & (loudness > relative_gate)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+def normalization_gain(samples: np.ndarray, loudness: float, target_lufs: float = None,
+                       peak_dbfs: float = None) -> float:
+    """Gain in dB that reaches the target loudness without pushing peaks past peak_dbfs"""
+    target_lufs = config.AUDIO_TARGET_LUFS if target_lufs is None else target_lufs
+    peak_dbfs = config.AUDIO_PEAK_DBFS if peak_dbfs is None else peak_dbfs
+    if not np.isfinite(loudness):
+        return 0.0
+    gain_db = target_lufs - loudness
+    peak = float(np.max(np.abs(samples)))
+    if peak > 0:
+        gain_db = min(gain_db, peak_dbfs - 20 * np.log10(peak))
+    return gain_db
+
+def apply_fades(samples: np.ndarray, fade: float):
+    """Linear fade in and out, in place"""
+    n = min(int(fade * SAMPLE_RATE), len(samples) // 2)
+    if n == 0:
+        return
+    ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    samples[:n] *= ramp
+    samples[-n:] *= ramp[::-1]
+
+def prepare_audio(audio_path: str, output_path: str, fade: float = 0.0) -> dict:
+    """Decode, trim, normalize and fade the narration, then encode it to AAC once
+
+    Returns the AAC path, its duration, the seconds trimmed from the start
+    (to shift captions by) and the loudness before and after.
+    """
+    with telemetry.span('audio.prepare') as attrs:
+        samples = decode_pcm(audio_path)
+        samples, trimmed = trim_silence(samples)
+        loudness = integrated_loudness(samples)
+        gain_db = normalization_gain(samples, loudness)
+        samples *= np.float32(10 ** (gain_db / 20))
+        apply_fades(samples, fade)
+        encode_aac(samples, output_path)
+
+        attrs.update({
+            'loudness_in': loudness,
+            'gain_db': gain_db,
+            'trimmed_start': trimmed,
+            'seconds_of_audio': len(samples) / SAMPLE_RATE
+        })
+
+    print(f"🔊 Narration: {loudness:.1f} LUFS → {loudness + gain_db:.1f} LUFS ({gain_db:+.1f} dB), "
+          f"{trimmed:.2f}s of leading silence trimmed")
+    return {
+        'path': output_path,
+        'duration': len(samples) / SAMPLE_RATE,
+        'trimmed_start': trimmed,
+        'loudness': loudness,
+        'gain_db': gain_db
+    }
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("Usage: python audio_prep.py <audio file>")
+        sys.exit(1)
+    samples = decode_pcm(sys.argv[1])
+    print(f"Integrated loudness: {integrated_loudness(samples):.1f} LUFS")
@@ -0,0 +1,208 @@
+"""
+Batch mode for the YouTube Shorts Bot.
+Pushes many topics through script -> voice -> image -> render, with a bounded
+worker pool per stage and bounded queues between stages for backpressure.
+"""
+
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from utils import Workspace, available_memory_mb
+
+_DONE = object()
+
+def read_topics_file(path: str) -> list:
+    """Read one topic per line, skipping blank lines and # comments"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def topic_slug(topic: str) -> str:
+    """Make a short filesystem-safe name for a topic"""
+    slug = re.sub(r'[^a-z0-9]+', '_', topic.lower()).strip('_')
+    return slug[:40] or 'topic'
+
+def prefetch_scripts(topics: list) -> dict:
+    """Generate every topic's script up front in batched model calls"""
+    from script_gen import generate_scripts
+
+    try:
+        return generate_scripts(topics)
+    except Exception as e:
+        print(f"⚠️ Batched script generation failed ({e}); generating per topic")
+        return {}
+
+def _script_stage(job: dict):
+    from script_gen import ensure_unique, generate_script
+
+    script = job.get('script') or generate_script(job['topic'])  # Usually prefetched in a batched request
+    if not script or len(script) < 20:
+        raise ValueError("Generated script is too short or empty")
+    job['script'] = ensure_unique(job['topic'], script)
+
+def _voice_stage(job: dict):
+    from voice_gen import generate_voice, generate_voice_segmented
+
+    job['sentence_durations'] = None
+    if config.VOICE_SEGMENTED:
+        job['audio_path'], job['sentence_durations'] = generate_voice_segmented(
+            job['script'], job['workspace'].audio_path
+        )
+    else:
+        job['audio_path'] = generate_voice(job['script'], job['workspace'].audio_path)
+
+def _image_stage(job: dict):
+    from image_gen import get_background_image, prepare_frame
+
+    job['image_path'] = get_background_image(job['topic'], job['workspace'].image_path)
+    job['frame_path'] = prepare_frame(job['image_path'], job['workspace'].frame_path)
+
+def default_render_workers() -> int:
+    """One render process per CPU core, but no more than fit in memory at the render budget"""
+    workers = os.cpu_count() or 1
+    available = available_memory_mb()
+    if config.RENDER_ENGINE == 'stream' and config.RENDER_MEMORY_BUDGET_MB and available:
+        workers = min(workers, int(available // config.RENDER_MEMORY_BUDGET_MB))
+    return max(workers, 1)
+
+def _render_video(job: dict, output_path: str) -> str:
+    """Render in a worker process (module-level so it can be pickled)
+
+    job holds only picklable fields; engine, profile and formats come from
+    the parent's config, since spawned workers re-import config from scratch.
+    """
+    from video_gen import render_short
+    return render_short(job['frame_path'], job['audio_path'], output_path, job['script'],
+                        job['sentence_durations'], image_path=job['image_path'],
+                        work_path=job['work_path'], engine=job['engine'], profile=job['profile'],
+                        formats=job['formats'])
+
+def _start_stage(name: str, func, workers: int, inbox: queue.Queue, outbox: queue.Queue,
+                 results: list) -> list:
+    """Start a pool of threads that run func on each job from inbox and pass it on"""
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                inbox.put(_DONE)  # Let sibling workers see it too
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    outbox.put(_DONE)
+                return
+
+            start = time.perf_counter()
+            try:
+                func(job)
+            except Exception as e:
+                job['status'] = 'failed'
+                job['failed_stage'] = name
+                job['error'] = f"{type(e).__name__}: {e}"
+                print(f"❌ [{job['topic']}] {name} failed: {e}")
+                results.append(job)
+                continue
+            finally:
+                job['timings'][name] = time.perf_counter() - start
+
+            if outbox is not None:
+                outbox.put(job)  # Blocks while the next stage is saturated
+            else:
+                results.append(job)
+
+    threads = [threading.Thread(target=worker, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def run_batch(topics: list, output_dir: str = None) -> list:
+    """Run many topics through the pipeline and return a per-topic report"""
+    from utils import setup_directories
+
+    setup_directories()
+    output_dir = output_dir or config.BATCH_OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    render_workers = config.BATCH_RENDER_WORKERS or default_render_workers()
+
+    queues = [queue.Queue(maxsize=config.BATCH_QUEUE_SIZE) for _ in range(4)]
+    results = []
+
+    # Spawn, not fork: the stage threads may hold telemetry, cache or stdout locks at fork time
+    with ProcessPoolExecutor(max_workers=render_workers, mp_context=multiprocessing.get_context('spawn')) as render_pool:
+        def render_stage(job):
+            output_path = os.path.join(output_dir, f"{job['index']:03d}_{topic_slug(job['topic'])}.mp4")
+            render_job = {name: job[name] for name in
+                          ('frame_path', 'image_path', 'audio_path', 'script', 'sentence_durations')}
+            render_job.update({
+                # Render inside the workspace so moviepy's temp audio never lands in output_dir
+                'work_path': job['workspace'].video_path,
+                'engine': config.RENDER_ENGINE,
+                'profile': config.ENCODING_PROFILE,
+                'formats': config.EXTRA_OUTPUT_FORMATS
+            })
+            job['video_path'] = render_pool.submit(_render_video, render_job, output_path).result()
+            job['status'] = 'ok'
+
+        stages = [
+            ('script', _script_stage, config.BATCH_SCRIPT_WORKERS),
+            ('voice', _voice_stage, config.BATCH_VOICE_WORKERS),
+            ('image', _image_stage, config.BATCH_IMAGE_WORKERS),
+            ('render', render_stage, render_workers)
+        ]
+        threads = []
+        for i, (name, func, workers) in enumerate(stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            threads += _start_stage(name, func, workers, queues[i], outbox, results)
+
+        scripts = prefetch_scripts(topics)
+        print(f"📦 Batch started: {len(topics)} topics, {render_workers} render workers")
+        for index, topic in enumerate(topics):
+            workspace = Workspace(prefix=f"{index:03d}_{topic_slug(topic)}")
+            queues[0].put({
+                'index': index,
+                'topic': topic,
+                'script': scripts.get(topic),
+                'workspace': workspace,
+                'status': 'pending',
+                'timings': {}
+            })
+        queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+    if config.CLEAN_TEMP_FILES:
+        for job in results:
+            job.pop('workspace').cleanup()
+
+    report = sorted(results, key=lambda job: job['index'])
+    print_batch_report(report)
+    return report
+
+def print_batch_report(report: list):
+    """Print a per-topic success/failure summary"""
+    succeeded = sum(1 for job in report if job['status'] == 'ok')
+    print(f"\n📊 Batch finished: {succeeded}/{len(report)} succeeded")
+    for job in report:
+        total = sum(job['timings'].values())
+        if job['status'] == 'ok':
+            print(f"✅ {job['topic']} -> {job['video_path']} ({total:.1f}s)")
+        else:
+            print(f"❌ {job['topic']} failed at {job['failed_stage']}: {job['error']}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render many Shorts in one run")
+    parser.add_argument("topics_file", help="File with one topic per line")
+    args = parser.parse_args()
+
+    run_batch(read_topics_file(args.topics_file))
@@ -0,0 +1,1301 @@
+"""
+Benchmarks for the YouTube Shorts Bot.
+Builds synthetic inputs and local stand-ins for Gemini, gTTS, Pexels and
+YouTube, so no API keys or network access are needed.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import config
+
+CANNED_SCRIPT = (
+    "Did you know that the Golden Gate Bridge grows and shrinks by almost a metre "
+    "every year? Steel expands in the summer heat and contracts in the winter cold. "
+    "Engineers leave expansion joints so the deck can slide instead of cracking. "
+    "Next time you cross a bridge, look down for the metal teeth. "
+    "Like and subscribe for more engineering facts!"
+)
+
+def make_test_image(path: str, width: int = 1600, height: int = 1200) -> str:
+    """Create a landscape gradient image to exercise the crop path"""
+    from PIL import Image
+
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    pixels[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    pixels[..., 2] = 128
+    Image.fromarray(pixels).save(path, format='JPEG')
+    return path
+
+def make_test_audio(path: str, seconds: float, sample_rate: int = 44100) -> str:
+    """Write a mono sine tone WAV of the given length"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (12000 * np.sin(2 * np.pi * 220 * t)).astype('<i2')
+
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return path
+
+def cpu_seconds() -> float:
+    """CPU time used by this process and its finished children (ffmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def measure(render, seconds: float) -> dict:
+    """Run one render and report wall-clock and CPU time per rendered second"""
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    render()
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+    return {
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'wall_per_second': wall / seconds,
+        'cpu_per_second': cpu / seconds
+    }
+
+def benchmark_render_engines(seconds: float = 10.0) -> dict:
+    """Compare the moviepy and still-image render engines on the same inputs"""
+    from video_gen import create_video_moviepy, create_video_still
+
+    engines = {
+        'moviepy': create_video_moviepy,
+        'still': create_video_still
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = make_test_image(os.path.join(work_dir, 'background.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+
+        for name, render in engines.items():
+            output_path = os.path.join(work_dir, f'{name}.mp4')
+            results[name] = measure(
+                lambda: render(image_path, audio_path, output_path), seconds
+            )
+            results[name]['bytes'] = os.path.getsize(output_path)
+
+    print(f"\nRender engines ({seconds:.0f}s of {config.VIDEO_WIDTH}x{config.VIDEO_HEIGHT} @ {config.VIDEO_FPS}fps)")
+    print(f"{'engine':<10}{'wall s':>10}{'cpu s':>10}{'wall/s':>10}{'cpu/s':>10}{'MB':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<10}{r['wall_seconds']:>10.2f}{r['cpu_seconds']:>10.2f}"
+            f"{r['wall_per_second']:>10.3f}{r['cpu_per_second']:>10.3f}"
+            f"{r['bytes'] / (1024 * 1024):>8.1f}"
+        )
+    return results
+
+def benchmark_encoding_profiles(seconds: float = 10.0, target_size_mb: float = 2.0) -> dict:
+    """Encode the same still-engine video with every profile and with a target size"""
+    from video_gen import ENCODING_PROFILES, create_video_still
+
+    cases = [(name, name, None) for name in ENCODING_PROFILES]
+    cases.append((f'{target_size_mb:g} MB target', config.ENCODING_PROFILE, target_size_mb))
+    results = {}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = make_test_image(os.path.join(work_dir, 'background.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+
+        saved_target = config.TARGET_SIZE_MB
+        try:
+            for name, profile, target in cases:
+                config.TARGET_SIZE_MB = target
+                output_path = os.path.join(work_dir, f'{profile}-{target}.mp4')
+                results[name] = measure(
+                    lambda: create_video_still(image_path, audio_path, output_path, profile=profile), seconds
+                )
+                results[name]['bytes'] = os.path.getsize(output_path)
+        finally:
+            config.TARGET_SIZE_MB = saved_target
+
+    print(f"\nEncoding profiles ({seconds:.0f}s of {config.VIDEO_WIDTH}x{config.VIDEO_HEIGHT} @ {config.VIDEO_FPS}fps)")
+    print(f"{'profile':<16}{'wall s':>10}{'speed':>10}{'KB/s':>10}{'MB':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<16}{r['wall_seconds']:>10.2f}{seconds / r['wall_seconds']:>9.1f}x"
+            f"{r['bytes'] / seconds / 1024:>10.0f}{r['bytes'] / (1024 * 1024):>8.2f}"
+        )
+    return results
+
+def benchmark_captions(seconds: float = 10.0) -> dict:
+    """Compare plain and captioned renders for the per-frame and still engines"""
+    from captions import build_captions
+    from video_gen import create_video_moviepy, create_video_still
+    from voice_gen import split_sentences
+
+    captions = build_captions(split_sentences(CANNED_SCRIPT), total_duration=seconds)
+    engines = {
+        'moviepy': create_video_moviepy,
+        'still': create_video_still
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = make_test_image(os.path.join(work_dir, 'background.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+
+        for name, render in engines.items():
+            for label, timed in (('plain', None), ('captioned', captions)):
+                output_path = os.path.join(work_dir, f'{name}-{label}.mp4')
+                results[f'{name} {label}'] = measure(
+                    lambda: render(image_path, audio_path, output_path, captions=timed), seconds
+                )
+
+    print(f"\nCaptions ({len(captions)} phrases over {seconds:.0f}s)")
+    print(f"{'render':<20}{'wall s':>10}{'overhead':>10}")
+    for name in engines:
+        plain = results[f'{name} plain']['wall_seconds']
+        captioned = results[f'{name} captioned']['wall_seconds']
+        print(f"{name + ' plain':<20}{plain:>10.2f}")
+        print(f"{name + ' captioned':<20}{captioned:>10.2f}{(captioned / plain - 1) * 100:>9.0f}%")
+    return results
+
+def benchmark_multi_output(seconds: float = 10.0, formats: tuple = ('shorts', 'square', 'landscape')) -> dict:
+    """Compare rendering N formats in one pass with N separate renders
+
+    Also splits each mode into narration prep, compositing and encoding, since
+    one pass only saves the shared work; the x264 encodes are needed either way.
+    """
+    import telemetry
+    from video_gen import create_video
+
+    stages = ('render.audio_load', 'render.composite', 'render.encode')
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = make_test_image(os.path.join(work_dir, 'background.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+        specs = [{'path': os.path.join(work_dir, f'{name}.mp4'), 'format': name} for name in formats]
+
+        def separate():
+            for spec in specs:
+                create_video(image_path, audio_path, [spec])
+
+        for name, render in (('separate', separate), ('one pass', lambda: create_video(image_path, audio_path, specs))):
+            telemetry.reset()
+            results[name] = measure(render, seconds)
+            spans = telemetry.summary()['spans']
+            for stage in stages:
+                results[name][stage] = spans.get(stage, {}).get('seconds', 0.0)
+
+    print(f"\nMulti-format output ({len(formats)} formats: {', '.join(formats)}; {seconds:.0f}s of video)")
+    print(f"{'mode':<10}{'wall s':>10}{'cpu s':>10}{'audio s':>10}{'frames s':>10}{'encode s':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['wall_seconds']:>10.2f}{r['cpu_seconds']:>10.2f}"
+              + ''.join(f"{r[stage]:>10.2f}" for stage in stages))
+    saved = 1 - results['one pass']['wall_seconds'] / results['separate']['wall_seconds']
+    print(f"One pass saves {saved:.0%} of the wall time")
+    return results
+
+def benchmark_effects(seconds: float = 10.0) -> dict:
+    """Time each Ken Burns preset against the still-image engine and check the budget"""
+    from video_gen import KEN_BURNS_PRESETS, create_video_still, create_video_with_effects
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = make_test_image(os.path.join(work_dir, 'background.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+        output_path = os.path.join(work_dir, 'output.mp4')
+
+        results['still'] = measure(
+            lambda: create_video_still(image_path, audio_path, output_path), seconds
+        )
+        for preset in KEN_BURNS_PRESETS:
+            results[preset] = measure(
+                lambda: create_video_with_effects(
+                    image_path, audio_path, output_path, zoom_preset=preset
+                ),
+                seconds
+            )
+
+    baseline = results['still']['wall_seconds']
+    print(f"\nKen Burns presets vs still engine (budget {config.EFFECTS_RENDER_BUDGET:.1f}x)")
+    print(f"{'render':<12}{'wall s':>10}{'cpu s':>10}{'ratio':>8}")
+    for name, r in results.items():
+        r['ratio'] = r['wall_seconds'] / baseline
+        r['within_budget'] = r['ratio'] <= config.EFFECTS_RENDER_BUDGET
+        flag = '' if r['within_budget'] else '  over budget'
+        print(f"{name:<12}{r['wall_seconds']:>10.2f}{r['cpu_seconds']:>10.2f}{r['ratio']:>7.1f}x{flag}")
+    return results
+
+def benchmark_voice_segments(pause: float = 0.3, seconds_per_word: float = 0.25) -> dict:
+    """Check that editing one sentence re-synthesizes only that sentence
+
+    Uses a counting fake TTS backend and a scratch cache, then checks the
+    sentence durations against the fake's output and the joined track.
+    """
+    import cache
+    from utils import probe_duration
+    from voice_gen import generate_voice_segmented, split_sentences
+
+    calls = []
+    calls_lock = threading.Lock()
+
+    def fake_tts(text: str, path: str):
+        with calls_lock:
+            calls.append(text)
+        make_test_audio(path, seconds_per_word * len(text.split()))
+
+    sentences = split_sentences(CANNED_SCRIPT)
+    edited = sentences[:]
+    edited[1] = edited[1].replace('summer', 'August')
+    saved = {name: getattr(config, name) for name in ('CACHE_ENABLED', 'CACHE_DIR')}
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        config.CACHE_ENABLED = True
+        config.CACHE_DIR = os.path.join(work_dir, 'cache')
+        cache._cache = None
+        try:
+            for name, script in (('first', sentences), ('edited', edited)):
+                calls.clear()
+                output_path = os.path.join(work_dir, f'{name}.mp3')
+                _, durations = generate_voice_segmented(
+                    ' '.join(script), output_path, fake_tts, engine='counting-fake', pause=pause
+                )
+                expected = [seconds_per_word * len(sentence.split()) for sentence in script]
+                results[name] = {
+                    'synthesized': list(calls),
+                    # Encoder padding and resampling shift lengths by a few milliseconds
+                    'durations_match': all(abs(d - e) < 0.05 for d, e in zip(durations, expected)),
+                    'track_error': probe_duration(output_path) - (sum(durations) + pause * (len(durations) - 1))
+                }
+        finally:
+            for name, value in saved.items():
+                setattr(config, name, value)
+            cache._cache = None
+
+    checks = {
+        'first run synthesizes every sentence': sorted(results['first']['synthesized']) == sorted(sentences),
+        'edit synthesizes only the edited sentence': results['edited']['synthesized'] == [edited[1]],
+        'durations match each sentence': all(r['durations_match'] for r in results.values()),
+        'durations line up with the joined track': all(abs(r['track_error']) < 0.1 for r in results.values())
+    }
+    print(f"\nSegmented voice ({len(sentences)} sentences, one edited)")
+    for name, r in results.items():
+        print(f"{name:<8}{len(r['synthesized']):>3} synthesized, track off by {r['track_error'] * 1000:+.0f} ms")
+    for check, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {check}")
+    results['passed'] = all(checks.values())
+    return results
+
+def _isolated_child(func, args, results):
+    start = time.perf_counter()
+    try:
+        func(*args)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"  # Reported, so the parent is not left waiting
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss  # Largest ffmpeg
+    results.put({'seconds': elapsed, 'peak_rss_mb': peak_kb / 1024, 'children_peak_rss_mb': children_peak_kb / 1024,
+                 'error': error})
+
+def run_isolated(func, *args) -> dict:
+    """Run func in a fresh child process and report its wall time and peak RSS (its own and its children's)"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=_isolated_child, args=(func, args, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def benchmark_memory(seconds: float = 10.0, engines: tuple = ('effects', 'stream'), budget_mb: float = None) -> dict:
+    """Compare peak memory of captioned Ken Burns renders, each in a fresh process"""
+    from captions import build_captions
+    from image_gen import prepare_frame
+    from video_gen import create_video
+    from voice_gen import split_sentences
+
+    captions = build_captions(split_sentences(CANNED_SCRIPT), total_duration=seconds)
+    saved_budget = config.RENDER_MEMORY_BUDGET_MB
+    config.RENDER_MEMORY_BUDGET_MB = budget_mb or config.RENDER_MEMORY_BUDGET_MB
+    budget = f", budget {config.RENDER_MEMORY_BUDGET_MB:.0f} MB" if config.RENDER_MEMORY_BUDGET_MB else ""
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            source_path = make_test_image(os.path.join(work_dir, 'source.jpg'))
+            frame_path = prepare_frame(source_path, os.path.join(work_dir, 'background.ppm'))
+            audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+            for engine in engines:
+                output_path = os.path.join(work_dir, f'{engine}.mp4')
+                results[engine] = run_isolated(create_video, frame_path, audio_path, output_path, engine, None, captions)
+    finally:
+        config.RENDER_MEMORY_BUDGET_MB = saved_budget
+
+    print(f"\nRender memory (Ken Burns + {len(captions)} captions, {seconds:.0f}s video{budget})")
+    print(f"{'engine':<10}{'seconds':>10}{'python MB':>11}{'ffmpeg MB':>11}{'total MB':>10}")
+    for engine, r in results.items():
+        r['total_peak_mb'] = r['peak_rss_mb'] + r['children_peak_rss_mb']
+        print(f"{engine:<10}{r['seconds']:>10.2f}{r['peak_rss_mb']:>11.1f}"
+              f"{r['children_peak_rss_mb']:>11.1f}{r['total_peak_mb']:>10.1f}"
+              + (f"  failed: {r['error']}" if r['error'] else ''))
+    return results
+
+def _legacy_image_stage(source_path: str, output_path: str):
+    """The old image stage: decode, stretch to output size, re-encode as JPEG"""
+    from PIL import Image
+
+    with Image.open(source_path) as img:
+        img = img.resize((config.VIDEO_WIDTH, config.VIDEO_HEIGHT), Image.Resampling.LANCZOS)
+    img.save(output_path)
+
+def benchmark_prepared_frame(seconds: float = 10.0) -> dict:
+    """Compare time and peak memory per stage for JPEG hand-off vs prepared frames"""
+    from image_gen import prepare_frame
+    from video_gen import create_video
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = make_test_image(os.path.join(work_dir, 'source.jpg'))
+        audio_path = make_test_audio(os.path.join(work_dir, 'audio.wav'), seconds)
+        jpeg_path = os.path.join(work_dir, 'background.jpg')
+        frame_path = os.path.join(work_dir, 'background.ppm')
+        output_path = os.path.join(work_dir, 'output.mp4')
+
+        results['before'] = {
+            'image': run_isolated(_legacy_image_stage, source_path, jpeg_path),
+            'render': run_isolated(create_video, jpeg_path, audio_path, output_path)
+        }
+        results['after'] = {
+            'image': run_isolated(prepare_frame, source_path, frame_path),
+            'render': run_isolated(create_video, frame_path, audio_path, output_path)
+        }
+
+    print(f"\nImage hand-off ({config.RENDER_ENGINE} engine, {seconds:.0f}s video)")
+    print(f"{'path':<8}{'stage':<8}{'seconds':>10}{'peak MB':>10}")
+    for path, stages in results.items():
+        for stage, r in stages.items():
+            print(f"{path:<8}{stage:<8}{r['seconds']:>10.2f}{r['peak_rss_mb']:>10.1f}")
+    return results
+
+class StubPexelsHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Pexels search and image CDN endpoints
+
+    Every fail_every-th request is answered with a 503, so the failure
+    schedule is the same on every run. /throttled always answers 429 with a
+    one-hour Retry-After.
+    """
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            fail = server.fail_every and server.requests % server.fail_every == 0
+            if fail:
+                server.failures += 1
+        if fail:
+            self._send(503, b'')
+        elif self.path == '/throttled':
+            self._send(429, b'', {'Retry-After': '3600'})
+        elif self.path.startswith('/v1/search'):
+            etag = '"stub-search-v1"'
+            if self.headers.get('If-None-Match') == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self._send(304, b'', {'ETag': etag})
+                return
+            host, port = server.server_address
+            body = json.dumps({
+                'photos': [{'src': {config.IMAGE_QUALITY: f'http://{host}:{port}/photo.jpg'}}]
+            }).encode()
+            self._send(200, body, {'ETag': etag, 'Content-Type': 'application/json'})
+        elif self.path == '/photo.jpg':
+            self._send(200, server.image_bytes, {'Content-Type': 'image/jpeg'})
+        else:
+            self._send(404, b'')
+
+    def _send(self, status: int, body: bytes, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(handler, **attrs) -> ThreadingHTTPServer:
+    """Start a stub HTTP server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.bytes_sent = 0
+    server.bytes_received = 0
+    server.lock = threading.Lock()
+    for name, value in attrs.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_stub_pexels(image_bytes: bytes, fail_every: int = 0) -> ThreadingHTTPServer:
+    """Start the stub Pexels server on a free local port"""
+    return start_stub_server(StubPexelsHandler, image_bytes=image_bytes, fail_every=fail_every,
+                             requests=0, failures=0, not_modified=0)
+
+def benchmark_http_fetch(fetches: int = 32, concurrency: int = 8, fail_every: int = 10) -> dict:
+    """Fetch backgrounds concurrently from the stub server, report bytes and latency, and check them
+
+    Every fetch must return the stub's image, every injected 503 must have
+    been retried, repeated searches must be revalidated with 304s, and a
+    Retry-After beyond HTTP_MAX_BACKOFF must give up instead of waiting.
+    """
+    import requests
+    import http_client
+    from image_gen import download_pexels_image
+
+    saved = {name: getattr(config, name) for name in ('PEXELS_API_URL', 'PEXELS_API_KEY', 'CACHE_ENABLED')}
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = make_test_image(os.path.join(work_dir, 'source.jpg'))
+        with open(source_path, 'rb') as f:
+            image_bytes = f.read()
+        server = start_stub_pexels(image_bytes, fail_every)
+
+        try:
+            host, port = server.server_address
+            config.PEXELS_API_URL = f'http://{host}:{port}/v1'
+            config.PEXELS_API_KEY = config.PEXELS_API_KEY or 'stub'
+            config.CACHE_ENABLED = False
+            stats_before = http_client.get_stats()
+
+            def fetch(i):
+                output_path = os.path.join(work_dir, f'{i}.jpg')
+                start = time.perf_counter()
+                try:
+                    download_pexels_image('engineering', output_path)
+                except Exception as e:
+                    print(f"❌ Fetch {i} failed: {e}")
+                    return time.perf_counter() - start, False
+                with open(output_path, 'rb') as f:
+                    return time.perf_counter() - start, f.read() == image_bytes
+
+            wall_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(fetch, range(fetches)))
+            wall = time.perf_counter() - wall_start
+            stats = {k: v - stats_before[k] for k, v in http_client.get_stats().items()}
+
+            server.fail_every = 0
+            throttled_start = time.perf_counter()
+            try:
+                http_client.request('GET', f'http://{host}:{port}/throttled')
+                gave_up = False
+            except requests.HTTPError:
+                gave_up = time.perf_counter() - throttled_start < config.HTTP_MAX_BACKOFF
+        finally:
+            server.shutdown()
+            for name, value in saved.items():
+                setattr(config, name, value)
+
+    latencies = sorted(seconds for seconds, _ in outcomes)
+    results = {
+        'fetches': fetches,
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'p50_seconds': latencies[len(latencies) // 2],
+        'p95_seconds': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        'server_bytes_sent': server.bytes_sent,
+        'server_503s': server.failures,
+        'server_304s': server.not_modified,
+        **stats
+    }
+
+    print(f"\nHTTP fetch ({fetches} fetches, {concurrency} concurrent, every {fail_every}th request 503s)")
+    for name, value in results.items():
+        print(f"{name:<20}{value:>14.3f}" if isinstance(value, float) else f"{name:<20}{value:>14}")
+
+    checks = {
+        'every fetch returned the image': all(ok for _, ok in outcomes),
+        # Only the stub's 503s fail here, so each one must have been retried
+        'every injected 503 was retried': stats['retries'] == server.failures,
+        'repeated searches were revalidated': 0 < server.not_modified == stats['not_modified'],
+        'a Retry-After over HTTP_MAX_BACKOFF gave up': gave_up
+    }
+    for check, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {check}")
+    results['passed'] = all(checks.values())
+    return results
+
+class StubResumableUploadHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the YouTube resumable upload protocol
+
+    POST opens a session and returns its URI in Location; each PUT carries
+    a Content-Range and is answered with 308 + Range until the file is
+    complete; 'bytes */total' queries the committed offset. Every
+    fail_every-th chunk is rejected with a 503 to exercise retries.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self._drain(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            session_id = f"s{len(self.server.sessions)}"
+            self.server.sessions[session_id] = bytearray()
+        host, port = self.server.server_address
+        self._reply(200, b'', {'Location': f'http://{host}:{port}/session/{session_id}'})
+
+    def do_PUT(self):
+        session_id = self.path.rsplit('/', 1)[-1].split('?')[0]
+        received = self.server.sessions.get(session_id)
+        length = int(self.headers.get('Content-Length', 0))
+        if received is None:
+            self._drain(length)
+            self._reply(404, b'')
+            return
+
+        content_range = self.headers.get('Content-Range', '')
+        total = int(content_range.rsplit('/', 1)[-1]) if '/' in content_range else None
+        if content_range.startswith('bytes */'):
+            self._drain(length)
+            self._progress(received, total)
+            return
+
+        with self.server.lock:
+            self.server.chunks += 1
+            fail = self.server.fail_every and self.server.chunks % self.server.fail_every == 0
+        data = self._drain(length)
+        if fail:
+            self._reply(503, b'')
+            return
+
+        first_byte = int(content_range.split(' ')[1].split('-')[0])
+        with self.server.lock:
+            self.server.offsets.append(first_byte)
+        if first_byte == len(received):
+            received.extend(data)
+        self._progress(received, total)
+
+    def _progress(self, received: bytearray, total: int):
+        if total is not None and len(received) >= total:
+            body = json.dumps({'id': 'stub-video', 'bytes': len(received)}).encode()
+            self._reply(200, body, {'Content-Type': 'application/json'})
+        elif received:
+            self._reply(308, b'', {'Range': f'bytes=0-{len(received) - 1}'})
+        else:
+            self._reply(308, b'')
+
+    def _drain(self, length: int) -> bytes:
+        data = self.rfile.read(length) if length else b''
+        with self.server.lock:
+            self.server.bytes_received += len(data)
+        return data
+
+    def _reply(self, status: int, body: bytes, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def benchmark_upload(megabytes: int = 64, fail_every: int = 5, restart: bool = True) -> dict:
+    """Upload a file through the resumable stand-in, optionally restarting midway, and check it
+
+    The server must end up with the exact file, and a restarted upload must
+    continue its session from the saved offset rather than from zero.
+    """
+    import hashlib
+    from urllib.parse import urlsplit, urlunsplit
+    from googleapiclient.discovery import build
+    from upload_youtube import build_upload_request, execute_resumable, save_upload_state
+
+    server = start_stub_server(
+        StubResumableUploadHandler, sessions={}, chunks=0, offsets=[], fail_every=fail_every
+    )
+    host, port = server.server_address
+    youtube = build('youtube', 'v3', developerKey='stub', static_discovery=True)
+
+    def stub_request(video_path):
+        request = build_upload_request(youtube, video_path, 'Benchmark', 'Benchmark upload')
+        parts = urlsplit(request.uri)
+        request.uri = urlunsplit(('http', f'{host}:{port}', parts.path, parts.query, ''))
+        return request
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = os.path.join(work_dir, 'video.mp4')
+        with open(video_path, 'wb') as f:
+            f.write(os.urandom(megabytes * 1024 * 1024))
+        with open(video_path, 'rb') as f:
+            file_digest = hashlib.sha256(f.read()).hexdigest()
+        state_path = os.path.join(work_dir, 'upload_state.json')
+
+        start = time.perf_counter()
+        resume_offset = None
+        if restart:
+            # Simulate a process dying after two chunks, then a fresh process resuming
+            request = stub_request(video_path)
+            for _ in range(2):
+                request.next_chunk()
+                save_upload_state(state_path, video_path, request.resumable_uri, request.resumable_progress)
+            resume_offset = request.resumable_progress
+        try:
+            response = execute_resumable(stub_request(video_path), video_path, state_path)
+        finally:
+            server.shutdown()
+        elapsed = time.perf_counter() - start
+
+    results = {
+        'file_bytes': megabytes * 1024 * 1024,
+        'server_bytes_received': server.bytes_received,
+        'committed_bytes': response['bytes'],
+        'chunks_sent': server.chunks,
+        'seconds': elapsed,
+        'mb_per_second': megabytes / elapsed,
+        'sessions': len(server.sessions)
+    }
+    print(f"\nResumable upload ({megabytes} MB, {config.UPLOAD_CHUNK_SIZE // (1024 * 1024)} MB chunks, "
+          f"503 every {fail_every} chunks, restart={restart})")
+    for name, value in results.items():
+        print(f"{name:<24}{value:>14.2f}" if isinstance(value, float) else f"{name:<24}{value:>14}")
+
+    checks = {
+        'every byte was committed': response['bytes'] == results['file_bytes'],
+        'the server holds the exact file': any(
+            hashlib.sha256(bytes(data)).hexdigest() == file_digest for data in server.sessions.values()
+        )
+    }
+    if restart:
+        # Two chunks went out before the restart; the next data chunk must pick up where they stopped
+        checks['the restart resumed its session'] = len(server.sessions) == 1
+        checks['the restart continued from the saved offset'] = (
+            resume_offset > 0 and len(server.offsets) > 2 and server.offsets[2] == resume_offset
+        )
+    for check, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {check}")
+    results['passed'] = all(checks.values())
+    return results
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Gemini generateContent endpoint
+
+    Structured-output requests get a JSON object with a script for every
+    topic in the response schema; every invalid_every-th topic gets a script
+    that is too long, so the individual re-request path runs. Every
+    fail_every-th call is answered with a 429 or, alternately, a 503 to
+    exercise retries. Each call sleeps for the configured model latency.
+    Single-topic requests are logged in server.single, over-long batch topics
+    in server.invalid and failed calls in server.failures.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = ' '.join(part.get('text', '') for content in request.get('contents', [])
+                          for part in content.get('parts', []))
+        schema = request.get('generationConfig', {}).get('responseSchema')
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            throttled = server.fail_every and server.calls % server.fail_every == 0
+            if throttled:
+                server.failures += 1
+        time.sleep(server.latency)
+        if throttled:
+            if server.failures % 2:
+                self._reply(429, {'error': {'code': 429, 'message': 'Resource exhausted', 'status': 'RESOURCE_EXHAUSTED'}})
+            else:
+                self._reply(503, {'error': {'code': 503, 'message': 'Service unavailable', 'status': 'UNAVAILABLE'}})
+            return
+
+        if schema:
+            scripts = {}
+            for topic in schema.get('required', []):
+                with server.lock:
+                    server.topics += 1
+                    invalid = server.invalid_every and server.topics % server.invalid_every == 0
+                    if invalid:
+                        server.invalid.append(topic)
+                scripts[topic] = CANNED_SCRIPT * (4 if invalid else 1)
+            text = json.dumps(scripts)
+        else:
+            match = re.search(r'script about: (.+)', prompt)
+            with server.lock:
+                server.single.append(match.group(1).strip() if match else None)
+            text = CANNED_SCRIPT
+
+        self._reply(200, {
+            'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+            'usageMetadata': {
+                'promptTokenCount': len(prompt) // 4,
+                'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': (len(prompt) + len(text)) // 4
+            }
+        })
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def benchmark_scripts(topics: int = 30, latency: float = 0.5, invalid_every: int = 7, fail_every: int = 9,
+                      requests_per_minute: int = 20) -> dict:
+    """Compare one request per topic with batched structured-output requests under a rate limit
+
+    Fails unless every 429/503 was retried, per-topic mode made exactly one
+    successful request per topic, and batched mode re-requested only the
+    topics whose batched script was invalid.
+    """
+    import gemini_client
+    import script_gen
+    import telemetry
+
+    server = start_stub_server(StubGeminiHandler, calls=0, topics=0, latency=latency,
+                               invalid_every=invalid_every, fail_every=fail_every,
+                               failures=0, single=[], invalid=[])
+    saved_config = {name: getattr(config, name)
+                    for name in ('GEMINI_API_KEY', 'GEMINI_BASE_URL', 'GEMINI_BACKOFF_BASE', 'CACHE_ENABLED')}
+    config.GEMINI_API_KEY = 'stub'
+    config.GEMINI_BASE_URL = 'http://%s:%d' % server.server_address[:2]
+    config.GEMINI_BACKOFF_BASE = 0.1
+    config.CACHE_ENABLED = False
+    gemini_client._client = None
+    names = [f"Engineering topic {i}" for i in range(topics)]
+    counts = {}
+
+    def run(label, func):
+        # Each mode starts with a full bucket
+        gemini_client.request_bucket = gemini_client.TokenBucket(requests_per_minute)
+        before = telemetry.summary()['counters']
+        failures, single, invalid = server.failures, len(server.single), len(server.invalid)
+        start = time.perf_counter()
+        scripts = func()
+        after = telemetry.summary()['counters']
+        delta = {name: after.get(f'gemini.{name}', 0) - before.get(f'gemini.{name}', 0)
+                 for name in ('calls', 'tokens', 'retries', 'throttle_seconds')}
+        counts[label] = {
+            'failures': server.failures - failures,
+            'single': server.single[single:],
+            'invalid': server.invalid[invalid:]
+        }
+        return label, {
+            'seconds': time.perf_counter() - start,
+            'scripts': len(scripts),
+            'model_calls': delta['calls'],
+            'retries': delta['retries'],
+            'throttle_seconds': delta['throttle_seconds'],
+            'tokens_per_script': delta['tokens'] / max(len(scripts), 1)
+        }
+
+    try:
+        results = dict([
+            run('per topic', lambda: [script_gen.generate_script(topic) for topic in names]),
+            run('batched', lambda: script_gen.generate_scripts(names))
+        ])
+    finally:
+        for name, value in saved_config.items():
+            setattr(config, name, value)
+        gemini_client._client = None
+        gemini_client.request_bucket = gemini_client.TokenBucket(config.GEMINI_REQUESTS_PER_MINUTE)
+        server.shutdown()
+
+    print(f"\nScript generation ({topics} topics, {latency * 1000:.0f} ms model latency, "
+          f"{requests_per_minute} requests/minute, every {fail_every}th call 429s or 503s)")
+    print(f"{'mode':<12}{'seconds':>10}{'scripts':>10}{'calls':>8}{'retries':>9}{'throttled s':>13}{'tokens/script':>16}")
+    for label, r in results.items():
+        print(f"{label:<12}{r['seconds']:>10.2f}{r['scripts']:>10}{r['model_calls']:>8}{r['retries']:>9}"
+              f"{r['throttle_seconds']:>13.1f}{r['tokens_per_script']:>16.0f}")
+
+    per_topic, batched = counts['per topic'], counts['batched']
+    checks = {
+        'every 429/503 was retried': all(
+            results[label]['retries'] == counts[label]['failures'] for label in counts
+        ) and all(results[label]['scripts'] == topics for label in counts),
+        'per topic made one successful request per topic': sorted(per_topic['single']) == sorted(names),
+        'batched re-requested only the invalid topics': (
+            bool(batched['invalid']) and sorted(batched['single']) == sorted(batched['invalid'])
+        )
+    }
+    print()
+    for check, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {check}")
+    results['passed'] = all(checks.values())
+    return results
+
+def benchmark_dedup(scripts: int = 20000, lookups: int = 500) -> dict:
+    """Time near-duplicate lookups against an index of synthetic past scripts"""
+    from dedup import ContentIndex
+
+    rng = random.Random(42)
+    vocabulary = [f"w{i}" for i in range(3000)]
+
+    def make_script():
+        return ' '.join(rng.choice(vocabulary) for _ in range(120))
+
+    def rewrite(script, fraction):
+        words = script.split()
+        for i in rng.sample(range(len(words)), int(len(words) * fraction)):
+            words[i] = rng.choice(vocabulary)
+        return ' '.join(words)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        index = ContentIndex(os.path.join(work_dir, 'index.db'))
+        past = [make_script() for _ in range(scripts)]
+        start = time.perf_counter()
+        for i, script in enumerate(past):
+            index.add(f"topic {i}", script)
+        build_seconds = time.perf_counter() - start
+
+        cases = {
+            'unrelated': [make_script() for _ in range(lookups)],
+            'near-duplicate': [rewrite(rng.choice(past), 0.1) for _ in range(lookups)],
+            'reworded': [rewrite(rng.choice(past), 0.5) for _ in range(lookups)]
+        }
+        results = {'indexed': scripts, 'build_seconds': build_seconds}
+        for name, queries in cases.items():
+            latencies = []
+            flagged = 0
+            for query in queries:
+                start = time.perf_counter()
+                flagged += index.find(query) is not None
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            results[name] = {
+                'flagged': flagged / len(queries),
+                'p50_ms': latencies[len(latencies) // 2] * 1000,
+                'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000
+            }
+        index.close()
+
+    print(f"\nNear-duplicate lookups ({scripts} scripts indexed in {build_seconds:.1f}s)")
+    print(f"{'query':<16}{'flagged':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name in cases:
+        r = results[name]
+        print(f"{name:<16}{r['flagged']:>10.1%}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}")
+    return results
+
+@contextmanager
+def offline_services(work_dir: str, audio_seconds: float):
+    """Swap Gemini, gTTS, Pexels and YouTube for local stand-ins
+
+    Yields an upload(video_path) function that publishes the file through
+    main.publish_video, with the YouTube client pointed at the resumable
+    upload stand-in.
+    """
+    from urllib.parse import urlsplit, urlunsplit
+    import script_gen
+    import upload_youtube
+    import voice_gen
+    from main import publish_video
+
+    source_path = make_test_image(os.path.join(work_dir, 'stub_source.jpg'))
+    with open(source_path, 'rb') as f:
+        pexels = start_stub_pexels(f.read())
+    uploads = start_stub_server(StubResumableUploadHandler, sessions={}, chunks=0, offsets=[], fail_every=0)
+
+    saved_config = {name: getattr(config, name) for name in (
+        'PEXELS_API_URL', 'PEXELS_API_KEY', 'GEMINI_API_KEY', 'UPLOAD_QUEUE_ENABLED', 'UPLOAD_STATE_DIR'
+    )}
+    saved_script = script_gen.generate_script
+    saved_voice = voice_gen._synthesize_gtts
+    saved_upload = upload_youtube.get_authenticated_service, upload_youtube.build_upload_request
+
+    host, port = pexels.server_address
+    config.PEXELS_API_URL = f'http://{host}:{port}/v1'
+    config.PEXELS_API_KEY = 'stub'
+    config.GEMINI_API_KEY = 'stub'
+    config.UPLOAD_QUEUE_ENABLED = False
+    config.UPLOAD_STATE_DIR = os.path.join(work_dir, 'upload_state')
+    script_gen.generate_script = lambda topic: CANNED_SCRIPT
+    voice_gen._synthesize_gtts = lambda text, path: make_test_audio(path, audio_seconds)
+
+    def get_stub_service():
+        from googleapiclient.discovery import build
+        return build('youtube', 'v3', developerKey='stub', static_discovery=True)
+
+    def build_stub_request(youtube, video_path, title, description):
+        request = saved_upload[1](youtube, video_path, title, description)
+        upload_host, upload_port = uploads.server_address
+        parts = urlsplit(request.uri)
+        request.uri = urlunsplit(('http', f'{upload_host}:{upload_port}', parts.path, parts.query, ''))
+        return request
+
+    upload_youtube.get_authenticated_service = get_stub_service
+    upload_youtube.build_upload_request = build_stub_request
+
+    def upload(video_path: str):
+        # publish_video looks for credentials relative to the working directory
+        os.makedirs(os.path.join(work_dir, 'credentials'), exist_ok=True)
+        open(os.path.join(work_dir, 'credentials', 'client_secrets.json'), 'w').close()
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            publish_video(video_path, 'benchmark topic')
+        finally:
+            os.chdir(previous_dir)
+        received = sum(len(data) for data in uploads.sessions.values())
+        if received != os.path.getsize(video_path):
+            raise RuntimeError(f"Upload stand-in received {received} of {os.path.getsize(video_path)} bytes")
+        return received
+
+    try:
+        yield upload
+    finally:
+        for name, value in saved_config.items():
+            setattr(config, name, value)
+        script_gen.generate_script = saved_script
+        voice_gen._synthesize_gtts = saved_voice
+        upload_youtube.get_authenticated_service, upload_youtube.build_upload_request = saved_upload
+        pexels.shutdown()
+        uploads.shutdown()
+
+def last_run_summary(metrics_path: str) -> dict:
+    """The most recent run summary record in a metrics file"""
+    summary = {'spans': {}, 'counters': {}}
+    with open(metrics_path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('type') == 'summary':
+                summary = record
+    return summary
+
+def run_pipeline_case(resolution: tuple, fps: int, audio_seconds: float, engine: str) -> dict:
+    """Run the full pipeline once against offline stand-ins and collect stage metrics"""
+    import telemetry
+    from main import run_full_pipeline
+
+    overrides = {
+        'VIDEO_WIDTH': resolution[0],
+        'VIDEO_HEIGHT': resolution[1],
+        'VIDEO_FPS': fps,
+        'RENDER_ENGINE': engine,
+        'UPLOAD_TO_YOUTUBE': False,
+        'CLEAN_TEMP_FILES': False,
+        'CACHE_ENABLED': False,
+        'DEDUP_ENABLED': False,  # Keep offline runs out of the real content index
+        'METRICS_ENABLED': True  # Stage timings are read back from the run's summary record
+    }
+    saved = {name: getattr(config, name) for name in overrides}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        saved_paths = {name: getattr(config, name) for name in ('TEMP_DIR', 'WORKSPACE_DIR', 'METRICS_PATH')}
+        overrides.update({
+            'TEMP_DIR': work_dir,
+            'WORKSPACE_DIR': os.path.join(work_dir, 'runs'),
+            'METRICS_PATH': os.path.join(work_dir, 'metrics.jsonl')
+        })
+        saved.update(saved_paths)
+        for name, value in overrides.items():
+            setattr(config, name, value)
+
+        try:
+            with offline_services(work_dir, audio_seconds) as upload:
+                video_path = os.path.join(work_dir, 'output_video.mp4')
+                timings = measure(lambda: run_full_pipeline('benchmark topic', output_path=video_path), audio_seconds)
+                video_bytes = os.path.getsize(video_path)
+
+                upload_start = time.perf_counter()
+                upload(video_path)
+                upload_seconds = time.perf_counter() - upload_start
+                # The pipeline records under its own telemetry run, summarized in the metrics file
+                spans = last_run_summary(config.METRICS_PATH)['spans']
+        finally:
+            for name, value in saved.items():
+                setattr(config, name, value)
+
+    metrics = {
+        'pipeline_seconds': timings['wall_seconds'],
+        'cpu_seconds': timings['cpu_seconds'],
+        'video_seconds_per_wall_second': audio_seconds / timings['wall_seconds'],
+        'video_bytes': video_bytes,
+        'upload_seconds': upload_seconds,
+        'peak_rss_mb': telemetry.peak_rss_mb()
+    }
+    for name, total in spans.items():
+        if name.startswith(('stage.', 'render.')):
+            metrics[f'{name}.seconds'] = total['seconds']
+    return metrics
+
+def run_suite(resolutions: list, fps_values: list, durations: list, engines: list) -> dict:
+    """Run every combination of parameters and return a machine-readable result"""
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'cases': {}
+    }
+    for resolution, fps, seconds, engine in itertools.product(resolutions, fps_values, durations, engines):
+        case_id = f"{resolution[0]}x{resolution[1]}@{fps}fps/{seconds:g}s/{engine}"
+        print(f"\n⏱️ {case_id}")
+        results['cases'][case_id] = {
+            'params': {'width': resolution[0], 'height': resolution[1], 'fps': fps,
+                       'audio_seconds': seconds, 'engine': engine},
+            'metrics': run_pipeline_case(resolution, fps, seconds, engine)
+        }
+    return results
+
+def compare_results(results: dict, baseline: dict, tolerance: float = 0.10) -> list:
+    """Print per-case changes against a baseline and return the regressions"""
+    regressions = []
+    print(f"\nComparison against baseline ({tolerance:.0%} tolerance)")
+    for case_id, case in results['cases'].items():
+        if case_id not in baseline['cases']:
+            print(f"{case_id}: no baseline")
+            continue
+        old_metrics = baseline['cases'][case_id]['metrics']
+        for name, value in case['metrics'].items():
+            if not name.endswith('seconds') or name not in old_metrics or not old_metrics[name]:
+                continue
+            change = (value - old_metrics[name]) / old_metrics[name]
+            flag = ''
+            if change > tolerance:
+                flag = '  REGRESSION'
+                regressions.append((case_id, name, change))
+            print(f"{case_id:<36}{name:<28}{old_metrics[name]:>9.2f}{value:>9.2f}{change:>+8.0%}{flag}")
+    return regressions
+
+def import_report(module: str = 'main', top: int = 15) -> list:
+    """List the slowest imports of a module, as measured by python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'module': name.strip(), 'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+
+    rows.sort(key=lambda row: -row['cumulative_ms'])
+    print(f"\nSlowest imports for 'import {module}'")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for row in rows[:top]:
+        print(f"{row['cumulative_ms']:>14.1f}{row['self_ms']:>10.1f}  {row['module']}")
+    return rows
+
+def measure_cold_start(command: list = None, runs: int = 5, cwd: str = None) -> float:
+    """Best-of-N wall time for a fresh interpreter to run a CLI command (from the repo by default)"""
+    command = command or ['main.py', '--help']
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *command], check=True,
+            stdout=subprocess.DEVNULL, cwd=cwd or os.path.dirname(os.path.abspath(__file__))
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_cold_start(budget: float = None) -> bool:
+    """Fail when main.py's cold start exceeds the configured budget"""
+    budget = budget or config.COLD_START_BUDGET_SECONDS
+    checks = {
+        'main.py --help': measure_cold_start(['main.py', '--help']),
+        'import main': measure_cold_start(['-c', 'import main'])
+    }
+    print(f"\nCold start (budget {budget * 1000:.0f} ms)")
+    ok = True
+    for name, seconds in checks.items():
+        within = seconds <= budget
+        ok = ok and within
+        print(f"{name:<20}{seconds * 1000:>8.0f} ms{'' if within else '  OVER BUDGET'}")
+    return ok
+
+@contextmanager
+def stub_job(work_dir: str, audio_seconds: float = 3.0):
+    """Configure a small, fully offline pipeline job writing only under work_dir
+
+    Yields the run_full_pipeline overrides for one job.
+    """
+    overrides = {
+        'VIDEO_WIDTH': 360,
+        'VIDEO_HEIGHT': 640,
+        'UPLOAD_TO_YOUTUBE': False,
+        'CACHE_ENABLED': False,
+        'DEDUP_ENABLED': False,
+        'CAPTIONS_ENABLED': False,
+        'EXTRA_OUTPUT_FORMATS': [],
+        'WORKSPACE_IN_MEMORY': False,
+        'TEMP_DIR': os.path.join(work_dir, 'temp'),
+        'WORKSPACE_DIR': os.path.join(work_dir, 'runs'),
+        'METRICS_PATH': os.path.join(work_dir, 'metrics.jsonl')
+    }
+    saved = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    try:
+        with offline_services(work_dir, audio_seconds):
+            yield {'render_engine': 'still', 'encoding_profile': 'fast-draft', 'upload': False}
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+def run_stub_job(work_dir: str):
+    """Run one stubbed job in this process (the cold side of --daemon)"""
+    from main import run_full_pipeline
+
+    with stub_job(work_dir) as overrides:
+        run_full_pipeline('benchmark topic', output_path=os.path.join(work_dir, 'cold.mp4'), **overrides)
+
+def benchmark_daemon(runs: int = 3) -> dict:
+    """Compare the same stubbed job run by a cold main.py process and by a warm daemon
+
+    The warm figure is submit_job + wait_for_job against a running daemon;
+    the cold figure is a fresh interpreter importing the pipeline and
+    running the job. Fails if any job does not finish.
+    """
+    import daemon
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cold = measure_cold_start([os.path.abspath(__file__), '--stub-job', work_dir], runs, cwd=work_dir)
+        cold_ok = os.path.exists(os.path.join(work_dir, 'cold.mp4'))
+
+        saved_poll = config.DAEMON_POLL_SECONDS
+        config.DAEMON_POLL_SECONDS = 0.02  # Polling must not dominate the warm figure
+        server = daemon.serve(port=0)
+        url = 'http://%s:%d' % server.server_address[:2]
+        warm = None
+        statuses = []
+        try:
+            with stub_job(work_dir) as overrides:
+                for i in range(runs):
+                    start = time.perf_counter()
+                    job = daemon.submit_job('benchmark topic', dict(
+                        overrides, output_path=os.path.join(work_dir, f'warm_{i}.mp4')
+                    ), url=url)
+                    job = daemon.wait_for_job(job['id'], url=url)
+                    elapsed = time.perf_counter() - start
+                    warm = elapsed if warm is None else min(warm, elapsed)
+                    statuses.append(job['status'])
+        finally:
+            server.shutdown()
+            config.DAEMON_POLL_SECONDS = saved_poll
+
+    print(f"\nOne stubbed job, best of {runs}")
+    print(f"{'cold process':<20}{cold * 1000:>8.0f} ms")
+    print(f"{'warm daemon':<20}{warm * 1000:>8.0f} ms")
+    print(f"{'saved per job':<20}{(cold - warm) * 1000:>8.0f} ms")
+    checks = {
+        'cold process rendered the job': cold_ok,
+        'every daemon job finished': statuses == ['done'] * runs
+    }
+    for check, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {check}")
+    return {'cold_seconds': cold, 'warm_seconds': warm, 'saved_seconds': cold - warm,
+            'passed': all(checks.values())}
+
+def _parse_resolution(value: str) -> tuple:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render benchmarks")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of the test video")
+    parser.add_argument("--effects", action="store_true", help="Benchmark Ken Burns effects against the budget")
+    parser.add_argument("--profiles", action="store_true", help="Compare encoding profiles and a target-size encode")
+    parser.add_argument("--captions", action="store_true", help="Measure the cost of captions against plain renders")
+    parser.add_argument("--formats", nargs='+', help="Compare one multi-format pass with separate renders of these formats")
+    parser.add_argument("--target-size", type=float, default=2.0, help="Target size in MB for --profiles")
+    parser.add_argument("--http", action="store_true", help="Benchmark image fetching against a local stub server")
+    parser.add_argument("--frames", action="store_true", help="Compare JPEG hand-off with prepared frames")
+    parser.add_argument("--voice", action="store_true", help="Check segmented voice re-synthesizes only edited sentences")
+    parser.add_argument("--memory", action="store_true", help="Compare peak memory of the effects and stream engines")
+    parser.add_argument("--budget", type=float, help="Memory budget in MB for --memory")
+    parser.add_argument("--import-report", nargs='?', const='main', metavar='MODULE', help="Show the slowest imports of a module")
+    parser.add_argument("--cold-start", action="store_true", help="Check main.py's cold-start time against the budget")
+    parser.add_argument("--upload", action="store_true", help="Benchmark resumable uploads against a local stand-in")
+    parser.add_argument("--daemon", action="store_true", help="Time a stubbed job on a warm daemon against a cold process")
+    parser.add_argument("--stub-job", metavar='WORK_DIR', help=argparse.SUPPRESS)  # Cold side of --daemon
+    parser.add_argument("--dedup", action="store_true", help="Time near-duplicate lookups against a large script index")
+    parser.add_argument("--scripts", action="store_true", help="Compare per-topic and batched script generation against a fake model")
+    parser.add_argument("--suite", action="store_true", help="Run the offline full-pipeline suite")
+    parser.add_argument("--resolutions", nargs='+', default=['1080x1920'], help="Suite resolutions, e.g. 1080x1920 720x1280")
+    parser.add_argument("--fps", nargs='+', type=int, default=[config.VIDEO_FPS], help="Suite frame rates")
+    parser.add_argument("--durations", nargs='+', type=float, default=[10.0], help="Suite audio lengths in seconds")
+    parser.add_argument("--engines", nargs='+', default=['moviepy', 'still', 'effects'], help="Suite render engines")
+    parser.add_argument("--output", default='benchmark_results.json', help="Where to write suite results")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    if args.import_report:
+        import_report(args.import_report)
+    elif args.cold_start:
+        if not check_cold_start():
+            raise SystemExit(1)
+    elif args.suite:
+        results = run_suite(
+            [_parse_resolution(r) for r in args.resolutions], args.fps, args.durations, args.engines
+        )
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+        if args.compare:
+            with open(args.compare) as f:
+                if compare_results(results, json.load(f), args.tolerance):
+                    raise SystemExit(1)
+    elif args.dedup:
+        benchmark_dedup()
+    elif args.scripts:
+        if not benchmark_scripts()['passed']:
+            raise SystemExit(1)
+    elif args.daemon:
+        if not benchmark_daemon()['passed']:
+            raise SystemExit(1)
+    elif args.stub_job:
+        run_stub_job(args.stub_job)
+    elif args.upload:
+        if not benchmark_upload()['passed']:
+            raise SystemExit(1)
+    elif args.frames:
+        benchmark_prepared_frame(args.seconds)
+    elif args.voice:
+        if not benchmark_voice_segments()['passed']:
+            raise SystemExit(1)
+    elif args.memory:
+        benchmark_memory(args.seconds, budget_mb=args.budget)
+    elif args.http:
+        if not benchmark_http_fetch()['passed']:
+            raise SystemExit(1)
+    elif args.formats:
+        benchmark_multi_output(args.seconds, tuple(args.formats))
+    elif args.captions:
+        benchmark_captions(args.seconds)
+    elif args.profiles:
+        benchmark_encoding_profiles(args.seconds, args.target_size)
+    elif args.effects:
+        results = benchmark_effects(args.seconds)
+        if not all(r['within_budget'] for r in results.values()):
+            raise SystemExit(1)
+    else:
+        benchmark_render_engines(args.seconds)
@@ -0,0 +1,164 @@
+"""
+Content-addressed artifact cache for the YouTube Shorts Bot.
+Artifacts are stored under a hash of every input that affects them, so a
+repeated topic/prompt/voice setting skips the network call entirely.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import config
+import telemetry
+
+class ArtifactCache:
+    """Size-bounded on-disk cache with LRU eviction and atomic writes"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, **inputs) -> str:
+        """Hash the namespace and all inputs into a stable key"""
+        payload = json.dumps({'namespace': namespace, **inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str, suffix: str = '') -> str:
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key: str, suffix: str = ''):
+        """Return the cached file path for key, or None on a miss"""
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)  # Bump recency for LRU eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            telemetry.count('cache.misses')
+            return None
+        with self._lock:
+            self.hits += 1
+        telemetry.count('cache.hits')
+        return path
+
+    def put_file(self, key: str, source_path: str, suffix: str = '') -> str:
+        """Copy a file into the cache atomically"""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp, open(source_path, 'rb') as src:
+                shutil.copyfileobj(src, tmp)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+        self.evict()
+        return path
+
+    def get_text(self, key: str):
+        path = self.get(key, '.txt')
+        if path is None:
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def put_text(self, key: str, text: str):
+        path = self.path_for(key, '.txt')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+            tmp.write(text)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.writes += 1
+        self.evict()
+
+    def delete(self, key: str, suffix: str = ''):
+        """Drop an entry, e.g. a cached result that turned out to be unusable"""
+        try:
+            os.remove(self.path_for(key, suffix))
+        except FileNotFoundError:
+            pass
+
+    def delete_text(self, key: str):
+        self.delete(key, '.txt')
+
+    def fetch_file(self, key: str, output_path: str, produce, suffix: str = '') -> str:
+        """Copy a cached artifact to output_path, or produce it and cache it"""
+        cached_path = self.get(key, suffix)
+        if cached_path is not None:
+            shutil.copyfile(cached_path, output_path)
+            return output_path
+        produce(output_path)
+        self.put_file(key, output_path, suffix)
+        return output_path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.tmp'):
+                    continue  # In-flight write from another run
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide artifact cache, or None when caching is disabled"""
+    global _cache
+    if not config.CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+        return _cache
+
+if __name__ == "__main__":
+    cache = ArtifactCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+    cache.evict()
+    print(f"Cache at {config.CACHE_DIR}: {cache.stats()}")
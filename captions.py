@@ -0,0 +1,236 @@
+"""
+Caption engine for the YouTube Shorts Bot.
+Each caption is rasterized once with Pillow into an RGBA sprite, and frames
+are blended with NumPy only inside the sprite's bounding box, so captions
+need neither ImageMagick nor a per-frame composite of the whole picture.
+"""
+
+import bisect
+import functools
+import math
+import os
+import re
+
+import numpy as np
+
+import config
+
+FONT_CANDIDATES = (
+    'DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    'arial.ttf'
+)
+
+@functools.lru_cache(maxsize=None)
+def load_font(size: int):
+    """Load (once per size) the caption font, falling back to Pillow's default"""
+    from PIL import ImageFont
+
+    for path in ([config.CAPTION_FONT] if config.CAPTION_FONT else []) + list(FONT_CANDIDATES):
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        return ImageFont.load_default()
+
+def wrap_text(text: str, font, max_width: int) -> list:
+    """Greedily wrap words into lines no wider than max_width"""
+    lines = []
+    for word in text.split():
+        if lines and font.getlength(f"{lines[-1]} {word}") <= max_width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines
+
+class Sprite:
+    """A rasterized caption: premultiplied color and alpha ready for blending"""
+
+    def __init__(self, rgba: np.ndarray, x: int, y: int):
+        alpha = rgba[:, :, 3:4].astype(np.float32) / 255
+        self.alpha = alpha
+        self.inverse_alpha = 1 - alpha
+        self.premultiplied = rgba[:, :, :3].astype(np.float32) * alpha
+        self.x = x
+        self.y = y
+        self.height, self.width = rgba.shape[:2]
+
+    def blend(self, frame: np.ndarray, scratch: np.ndarray = None):
+        """Alpha-blend into an RGB uint8 frame in place, touching only the bounding box
+
+        scratch, a float32 array at least the sprite's size, avoids allocating
+        the intermediate.
+        """
+        region = frame[self.y:self.y + self.height, self.x:self.x + self.width]
+        if scratch is None:
+            blended = region * self.inverse_alpha
+        else:
+            blended = scratch[:self.height, :self.width]
+            np.multiply(region, self.inverse_alpha, out=blended)
+        blended += self.premultiplied
+        np.copyto(region, blended, casting='unsafe')
+
+@functools.lru_cache(maxsize=256)
+def render_sprite(text: str, fontsize: int, frame_width: int, frame_height: int) -> Sprite:
+    """Rasterize a caption once: wrapped, centred, white with a black outline"""
+    from PIL import Image, ImageDraw
+
+    font = load_font(fontsize)
+    stroke = max(fontsize // 16, 1)
+    margin = frame_width // 10
+    text = '\n'.join(wrap_text(text, font, frame_width - 2 * margin))
+
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox(
+        (0, 0), text, font=font, align='center', stroke_width=stroke
+    )
+    left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+    width = min(right - left, frame_width)
+    height = min(bottom - top, frame_height)
+
+    image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text(
+        (-left, -top), text, font=font, fill='white', align='center',
+        stroke_width=stroke, stroke_fill='black'
+    )
+
+    x = (frame_width - width) // 2
+    y = min(int(frame_height * config.CAPTION_POSITION), frame_height - height)
+    return Sprite(np.asarray(image), x, max(y, 0))
+
+class CaptionTrack:
+    """Timed captions as (start, end, text); frame(t) draws the one active at t"""
+
+    def __init__(self, captions: list, width: int = None, height: int = None, fontsize: int = None):
+        self.captions = sorted(captions)
+        self.starts = [start for start, _, _ in self.captions]
+        self.width = width or config.VIDEO_WIDTH
+        self.height = height or config.VIDEO_HEIGHT
+        self.fontsize = fontsize or config.CAPTION_FONT_SIZE
+        self._buffer = None
+        self._scratch = None
+
+    def sprite(self, index: int) -> Sprite:
+        return render_sprite(self.captions[index][2], self.fontsize, self.width, self.height)
+
+    def prepare(self) -> int:
+        """Rasterize every sprite and allocate one blend buffer for the largest; returns its bytes"""
+        sprites = [self.sprite(i) for i in range(len(self.captions))]
+        height = max((sprite.height for sprite in sprites), default=0)
+        width = max((sprite.width for sprite in sprites), default=0)
+        self._scratch = np.empty((height, width, 3), dtype=np.float32)
+        # Each sprite holds alpha, inverse alpha and three premultiplied channels
+        return self._scratch.nbytes + sum(sprite.alpha.nbytes * 5 for sprite in sprites)
+
+    def draw(self, frame: np.ndarray, index: int):
+        """Blend caption index into frame in place using the buffer from prepare()"""
+        self.sprite(index).blend(frame, self._scratch)
+
+    def active(self, t: float):
+        """Index of the caption shown at time t, or None"""
+        index = bisect.bisect_right(self.starts, t) - 1
+        if index >= 0 and t < self.captions[index][1]:
+            return index
+        return None
+
+    def apply(self, frame: np.ndarray, t: float) -> np.ndarray:
+        """Return frame with the active caption drawn; the input frame is never modified"""
+        index = self.active(t)
+        if index is None:
+            return frame
+        # Frames are written one at a time, so one reusable buffer is enough
+        if self._buffer is None or self._buffer.shape != frame.shape:
+            self._buffer = np.empty_like(frame)
+        np.copyto(self._buffer, frame)
+        self.sprite(index).blend(self._buffer)
+        return self._buffer
+
+    def segments(self, duration: float) -> list:
+        """Split [0, duration) into (start, end, caption index or None) pieces"""
+        pieces = []
+        cursor = 0.0
+        for index, (start, end, _) in enumerate(self.captions):
+            start, end = max(start, cursor), min(end, duration)
+            if end <= start:
+                continue
+            if start > cursor:
+                pieces.append((cursor, start, None))
+            pieces.append((start, end, index))
+            cursor = end
+        if cursor < duration:
+            pieces.append((cursor, duration, None))
+        return pieces
+
+def split_phrases(sentence: str, max_words: int) -> list:
+    """Break a sentence into phrases of at most max_words, preferring punctuation breaks"""
+    phrases = []
+    for clause in re.split(r'(?<=[,;:])\s+', sentence.strip()):
+        words = clause.split()
+        phrases += [' '.join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+    return phrases
+
+def build_captions(sentences: list, durations: list = None, total_duration: float = None,
+                   pause: float = 0.0, max_words: int = None) -> list:
+    """Time one phrase at a time from sentence timings
+
+    With per-sentence durations (segmented voice) each sentence starts at its
+    real offset; otherwise total_duration is shared out by character count.
+    Within a sentence, phrases get time in proportion to their length.
+    """
+    max_words = max_words or config.CAPTION_MAX_WORDS
+    if durations is None:
+        chars = [len(sentence) for sentence in sentences]
+        speech = total_duration - pause * (len(sentences) - 1)
+        durations = [speech * n / sum(chars) for n in chars]
+
+    captions = []
+    start = 0.0
+    for sentence, duration in zip(sentences, durations):
+        phrases = split_phrases(sentence, max_words)
+        chars = sum(len(phrase) for phrase in phrases)
+        phrase_start = start
+        for phrase in phrases:
+            phrase_end = phrase_start + duration * len(phrase) / chars
+            captions.append((phrase_start, phrase_end, phrase))
+            phrase_start = phrase_end
+        start += duration + pause
+    return captions
+
+def offset_captions(captions: list, seconds: float) -> list:
+    """Shift caption times (e.g. after trimming leading silence), dropping any that end before 0"""
+    return [
+        (max(start + seconds, 0.0), end + seconds, text)
+        for start, end, text in captions if end + seconds > 0
+    ]
+
+def write_caption_frames(frame: np.ndarray, track: CaptionTrack, duration: float, work_dir: str) -> str:
+    """Write one still per caption and an ffmpeg concat list that shows each for its span
+
+    Lets the still-image engine render captions without per-frame work: every
+    caption becomes a static frame, and x264 encodes the repeats as skips.
+    """
+    from PIL import Image
+
+    plain_path = os.path.join(work_dir, 'caption_none.ppm')
+    Image.fromarray(frame).save(plain_path)
+    lines = []
+    for start, end, index in track.segments(duration):
+        if index is None:
+            path = plain_path
+        else:
+            path = os.path.join(work_dir, f"caption_{index:03d}.ppm")
+            if not os.path.exists(path):
+                captioned = frame.copy()
+                track.sprite(index).blend(captioned)
+                Image.fromarray(captioned).save(path)
+        lines += [f"file '{os.path.abspath(path)}'", f"duration {end - start:.3f}"]
+    # The concat demuxer ignores the last entry's duration unless the file is repeated
+    lines.append(lines[-2])
+
+    list_path = os.path.join(work_dir, 'captions.txt')
+    with open(list_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return list_path
@@ -6,6 +6,7 @@ load_dotenv()
 
 # API Keys
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL')  # Override the API endpoint, e.g. a local fake model for tests
 PEXELS_API_KEY = os.getenv('PEXELS_API_KEY')
 YOUTUBE_CLIENT_ID = os.getenv('YOUTUBE_CLIENT_ID')
 YOUTUBE_CLIENT_SECRET = os.getenv('YOUTUBE_CLIENT_SECRET')
@@ -16,31 +17,141 @@ VIDEO_HEIGHT = 1920  # 9:16 aspect ratio for Shorts
 VIDEO_FPS = 30
 VIDEO_DURATION = 60  # Maximum duration in seconds
 
+# Render Settings
+RENDER_ENGINE = 'moviepy'  # 'moviepy' (per-frame), 'still' (static background straight into ffmpeg), 'effects' (Ken Burns) or 'stream' (Ken Burns within RENDER_MEMORY_BUDGET_MB)
+KEN_BURNS_PRESET = 'zoom_in'  # 'zoom_in', 'zoom_out', 'pan_left' or 'pan_right'
+KEN_BURNS_ZOOM = 0.02  # Extra scale applied over the clip (0.02 = 2% zoom)
+EFFECTS_RENDER_BUDGET = 6.0  # Max effects render time as a multiple of the still engine
+RENDER_MEMORY_BUDGET_MB = None  # Peak MB (Python + encoder) for the 'stream' engine; over it, degrade then fail
+ENCODING_PROFILE = 'balanced'  # 'fast-draft', 'balanced' or 'archival' (see video_gen.ENCODING_PROFILES)
+TARGET_SIZE_MB = None  # Encode to this file size for the known duration instead of constant quality
+ENCODING_THREADS = None  # x264 threads per encode (None = auto; lower it when rendering several at once)
+EXTRA_OUTPUT_FORMATS = []  # e.g. ['square', 'landscape'] (see video_gen.OUTPUT_FORMATS): rendered with the Short in one still-engine pass
+
+# Caption Settings
+CAPTIONS_ENABLED = False  # Burn the narration in as timed captions, one phrase at a time
+CAPTION_FONT = None  # Path to a .ttf; None tries DejaVu Sans Bold, then Pillow's default
+CAPTION_FONT_SIZE = 80
+CAPTION_POSITION = 0.7  # Top of the caption as a fraction of the frame height
+CAPTION_MAX_WORDS = 4  # Words per caption phrase
+
 # Audio Settings
 VOICE_LANGUAGE = 'en'
 AUDIO_BITRATE = '128k'
+VOICE_SEGMENTED = False  # Synthesize sentence by sentence in parallel with a per-sentence cache
+VOICE_SENTENCE_PAUSE = 0.25  # seconds of silence between sentences
+VOICE_MAX_WORKERS = 4  # Concurrent TTS requests in segmented mode
+AUDIO_TARGET_LUFS = -14.0  # Integrated loudness every narration is normalized to
+AUDIO_PEAK_DBFS = -1.0  # Normalization never pushes sample peaks above this
+AUDIO_SILENCE_DB = -45.0  # Leading/trailing audio quieter than this is trimmed
+AUDIO_SILENCE_PADDING = 0.1  # seconds of silence kept around the speech
 
 # File Paths
 TEMP_DIR = 'temp'
-TEMP_AUDIO_PATH = os.path.join(TEMP_DIR, 'audio.mp3')
-TEMP_IMAGE_PATH = os.path.join(TEMP_DIR, 'background.jpg')
-TEMP_VIDEO_PATH = os.path.join(TEMP_DIR, 'output_video.mp4')
+WORKSPACE_DIR = os.path.join(TEMP_DIR, 'runs')  # Each run gets its own directory here
+WORKSPACE_IN_MEMORY = False  # Keep intermediates on tmpfs (RAM) instead of disk
+WORKSPACE_MEMORY_DIR = '/dev/shm'  # tmpfs mount used when WORKSPACE_IN_MEMORY is on
+VIDEO_OUTPUT_DIR = 'output'  # Finished videos; intermediates stay in the run's workspace
+
+# Cache Settings
+CACHE_ENABLED = True  # Reuse scripts, narration and backgrounds for identical inputs
+CACHE_DIR = 'cache'
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # Least recently used artifacts are evicted beyond this
+
+# Metrics Settings
+METRICS_ENABLED = True  # Write timed spans and counters as JSON lines
+METRICS_PATH = os.path.join('output', 'metrics.jsonl')
+
+# Startup Settings
+COLD_START_BUDGET_SECONDS = 0.5  # benchmark.py --cold-start fails above this
+
+# Daemon Settings
+DAEMON_HOST = '127.0.0.1'  # Localhost only; the job API has no authentication
+DAEMON_PORT = 8765
+DAEMON_CONCURRENCY = 2  # Jobs rendered at once (each in its own workspace)
+DAEMON_POLL_SECONDS = 2  # How often clients check a submitted job
+SCHEDULER_USE_DAEMON = False  # Submit scheduled runs to daemon.py instead of rendering in-process
+
+# Scheduler Settings
+PUBLISH_TIME = '10:00'  # Daily publication time (local time)
+PRERENDER_ENABLED = True  # Render upcoming topics ahead of time and only publish at PUBLISH_TIME
+PRERENDER_DIR = os.path.join('output', 'prerendered')
+PRERENDER_BUFFER_SIZE = 3  # Finished videos to keep ready
+PRERENDER_LOW_WATER = 1  # Refill immediately below this many; otherwise top up during idle hours
+PRERENDER_IDLE_HOURS = (1, 6)  # Local hours [start, end) for topping up the buffer
+PRERENDER_SAFETY_FACTOR = 2.0  # Start deadline renders this many estimated durations early
+PRERENDER_DEFAULT_ESTIMATE = 900  # seconds per render until metrics give a better estimate
+PRERENDER_ESTIMATE_SAMPLES = 20  # Recent stage timings used for the estimate
+PRERENDER_RETRY_SECONDS = 300  # Wait after a failed pre-render, doubled per consecutive failure
+PRERENDER_MAX_RETRY_SECONDS = 6 * 3600  # Cap on that wait
+PRERENDER_MAX_ATTEMPTS = 3  # Failed renders of one topic before moving on to the next
+MIN_VIDEO_DURATION = 5  # seconds; shorter renders fail validation
 
 # Default Settings
 DEFAULT_TOPIC = "Amazing engineering facts"
 UPLOAD_TO_YOUTUBE = False  # Set to True when ready to upload
 CLEAN_TEMP_FILES = True
 
+# Batch Settings
+BATCH_OUTPUT_DIR = 'output'
+BATCH_QUEUE_SIZE = 4  # Jobs allowed to wait between stages before upstream blocks
+BATCH_SCRIPT_WORKERS = 4
+BATCH_VOICE_WORKERS = 4
+BATCH_IMAGE_WORKERS = 4
+BATCH_RENDER_WORKERS = None  # None = one render process per CPU core (capped by memory with RENDER_MEMORY_BUDGET_MB)
+
 # YouTube Settings
 YOUTUBE_CATEGORY_ID = '27'  # Education
 YOUTUBE_PRIVACY_STATUS = 'public'  # 'public', 'private', or 'unlisted'
 YOUTUBE_TAGS = ['shorts', 'ai', 'automation', 'educational', 'facts']
+YOUTUBE_TOKEN_REFRESH_MARGIN = 300  # Refresh the access token this many seconds before it expires
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per resumable chunk (multiple of 256 KB)
+UPLOAD_MAX_RETRIES = 8  # Consecutive retriable failures before giving up
+UPLOAD_STATE_DIR = os.path.join('output', 'upload_state')  # Session URIs for resuming after a restart
+
+# Upload Queue Settings
+UPLOAD_QUEUE_ENABLED = False  # Queue renders instead of uploading inline; needs an upload_queue.py worker to publish
+UPLOAD_QUEUE_DB = os.path.join('output', 'upload_queue.db')
+UPLOAD_QUEUE_DIR = os.path.join('output', 'queued')  # Durable home for videos awaiting upload
+UPLOAD_QUEUE_CONCURRENCY = 2
+UPLOAD_QUEUE_MAX_ATTEMPTS = 6
+UPLOAD_QUEUE_POLL_SECONDS = 300
+UPLOAD_QUEUE_DELETE_UPLOADED = False
+UPLOAD_RETRY_DELAY = 300  # seconds before the first retry, doubled per attempt
+UPLOAD_LEASE_SECONDS = 3600  # A claimed upload is retried if its worker vanished this long ago
+YOUTUBE_DAILY_QUOTA = 10000  # API units per day
+UPLOAD_QUOTA_COST = 1600  # Units per videos.insert
 
 # Script Generation Settings
 MAX_SCRIPT_LENGTH = 150  # words
+SCRIPT_BATCH_SIZE = 10  # Topics per structured-output request in script_gen.generate_scripts
+DEDUP_ENABLED = True  # Reject scripts that nearly repeat a past video (see dedup.py)
+DEDUP_INDEX_DB = os.path.join('output', 'content_index.db')
+DEDUP_THRESHOLD = 0.5  # Estimated Jaccard similarity of word bigrams that counts as a repeat
+DEDUP_MAX_REGENERATIONS = 2  # New angles to try before giving up on the topic
 TARGET_VIDEO_LENGTH = 50  # seconds
 WORDS_PER_MINUTE = 150
 
 # Image Settings
 IMAGE_SEARCH_ORIENTATION = 'portrait'
 IMAGE_QUALITY = 'large'
+PEXELS_API_URL = 'https://api.pexels.com/v1'
+
+# HTTP Settings
+HTTP_POOL_SIZE = 10  # Keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = 5  # seconds
+HTTP_READ_TIMEOUT = 30  # seconds
+HTTP_MAX_RETRIES = 3  # Retries on connection errors, 429 and 5xx
+HTTP_BACKOFF_BASE = 0.5  # seconds, doubled per attempt with full jitter
+HTTP_MAX_BACKOFF = 60  # seconds; longest wait before a retry (a longer Retry-After gives up)
+HTTP_CHUNK_SIZE = 64 * 1024  # bytes per streamed download chunk
+
+# Gemini Settings (shared by every call in the process, see gemini_client.py)
+GEMINI_REQUESTS_PER_MINUTE = 10
+GEMINI_TOKENS_PER_MINUTE = 1_000_000
+GEMINI_OUTPUT_TOKENS = 300  # Reply size reserved per call until the real token count is known
+GEMINI_TIMEOUT = 60  # seconds per call
+GEMINI_MAX_RETRIES = 4  # Retries on 429, 5xx, timeouts and dropped connections
+GEMINI_BACKOFF_BASE = 2.0  # seconds, doubled per attempt with full jitter
+GEMINI_BREAKER_THRESHOLD = 5  # Consecutive failures before calls fail fast
+GEMINI_BREAKER_RESET_SECONDS = 120  # How long the breaker stays open before one trial call
@@ -0,0 +1,241 @@
+"""
+Long-lived render daemon for the YouTube Shorts Bot.
+Imports the pipeline, locates ffmpeg and builds the Gen AI and YouTube
+clients once, then runs jobs submitted over a localhost JSON API:
+
+    POST /jobs       {"topic": "...", "overrides": {"render_engine": "still"}}
+    GET  /jobs       every job
+    GET  /jobs/<id>  one job's status, artifacts and timings
+    GET  /stats      warm-up cost, job counts and latency
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+# run_full_pipeline keyword arguments a job may set
+JOB_OVERRIDES = {'upload', 'render_engine', 'output_path', 'encoding_profile'}
+
+def daemon_url() -> str:
+    return f"http://{config.DAEMON_HOST}:{config.DAEMON_PORT}"
+
+def _import_pipeline():
+    import main, script_gen, voice_gen, image_gen, video_gen  # noqa: F401
+    import moviepy.editor  # noqa: F401  (video_gen imports it per render)
+
+def warm_up() -> dict:
+    """Pay the per-process startup costs now; returns seconds per step"""
+    from utils import get_ffmpeg_exe
+
+    steps = [('imports', _import_pipeline), ('ffmpeg', get_ffmpeg_exe)]
+    if config.GEMINI_API_KEY:
+        from gemini_client import get_client
+        steps.append(('genai_client', get_client))
+    if os.path.exists('credentials/token.pickle'):
+        # Only with a saved token: the first-time OAuth flow needs a browser
+        from upload_youtube import get_authenticated_service
+        steps.append(('youtube_auth', get_authenticated_service))
+
+    timings = {}
+    for name, func in steps:
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            print(f"⚠️ Warm-up step '{name}' failed: {e}")
+        timings[name] = time.perf_counter() - start
+    return timings
+
+class RenderDaemon:
+    """Job table plus a worker pool running run_full_pipeline"""
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or config.DAEMON_CONCURRENCY
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.warmup = {}
+
+    def warm_up(self):
+        self.warmup = warm_up()
+        print(f"🔥 Warm-up took {sum(self.warmup.values()):.2f}s: "
+              + ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.warmup.items()))
+
+    def submit(self, topic: str = None, overrides: dict = None) -> dict:
+        overrides = overrides or {}
+        unknown = set(overrides) - JOB_OVERRIDES
+        if unknown:
+            raise ValueError(f"Unknown overrides: {sorted(unknown)} (allowed: {sorted(JOB_OVERRIDES)})")
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'topic': topic or config.DEFAULT_TOPIC,
+            'overrides': overrides,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'queue_seconds': None,
+            'seconds': None,
+            'artifacts': {},
+            'error': None
+        }
+        with self.lock:
+            self.jobs[job['id']] = job
+        self.pool.submit(self._run, job['id'])
+        print(f"📨 Job {job['id']} queued: {job['topic']}")
+        return dict(job)
+
+    def _run(self, job_id: str):
+        from main import run_full_pipeline
+
+        with self.lock:
+            job = self.jobs[job_id]
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            job['queue_seconds'] = job['started_at'] - job['submitted_at']
+        start = time.perf_counter()
+        try:
+            video_path = run_full_pipeline(job['topic'], **job['overrides'])
+            result = {'status': 'done', 'artifacts': {'video_path': video_path}}
+        except Exception as e:
+            result = {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+        with self.lock:
+            job.update(result)
+            job['finished_at'] = time.time()
+            job['seconds'] = time.perf_counter() - start
+        print(f"{'✅' if job['status'] == 'done' else '❌'} Job {job_id} {job['status']} in {job['seconds']:.1f}s")
+
+    def get(self, job_id: str):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self) -> list:
+        with self.lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def stats(self) -> dict:
+        jobs = self.list()
+        finished = [job['seconds'] for job in jobs if job['seconds'] is not None]
+        counts = {}
+        for job in jobs:
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {
+            'uptime_seconds': time.time() - self.started_at,
+            'concurrency': self.concurrency,
+            'warmup': self.warmup,
+            # Startup work a cold process would repeat for every job
+            'saved_per_job_seconds': sum(self.warmup.values()),
+            'jobs': counts,
+            'mean_job_seconds': sum(finished) / len(finished) if finished else None
+        }
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """JSON API over the server's RenderDaemon"""
+
+    def _send(self, status: int, body):
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        daemon = self.server.render_daemon
+        if self.path == '/jobs':
+            self._send(200, daemon.list())
+        elif self.path.startswith('/jobs/'):
+            job = daemon.get(self.path[len('/jobs/'):])
+            self._send(200 if job else 404, job or {'error': 'unknown job'})
+        elif self.path == '/stats':
+            self._send(200, daemon.stats())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            job = self.server.render_daemon.submit(payload.get('topic'), payload.get('overrides'))
+        except (ValueError, AttributeError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        self._send(202, job)
+
+    def log_message(self, format, *args):
+        pass  # Keep the pipeline's own output readable
+
+def serve(host: str = None, port: int = None, concurrency: int = None, warm: bool = True) -> ThreadingHTTPServer:
+    """Start the daemon's HTTP server in a background thread"""
+    from utils import setup_directories
+
+    setup_directories()
+    daemon = RenderDaemon(concurrency)
+    if warm:
+        daemon.warm_up()
+    if port is None:
+        port = config.DAEMON_PORT  # 0 picks a free port
+    server = ThreadingHTTPServer((host or config.DAEMON_HOST, port), DaemonHandler)
+    server.render_daemon = daemon
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _call(method: str, path: str, payload: dict = None, url: str = None):
+    """Send one JSON request to the daemon"""
+    url = (url or daemon_url()) + path
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=config.HTTP_READ_TIMEOUT) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise ValueError(f"Daemon rejected {method} {path}: {e.read().decode('utf-8', 'replace')}") from e
+    except urllib.error.URLError as e:
+        raise ConnectionError(f"Render daemon not reachable at {url}: {e.reason}") from e
+
+def submit_job(topic: str = None, overrides: dict = None, url: str = None) -> dict:
+    """Queue a pipeline run on the daemon and return the new job"""
+    return _call('POST', '/jobs', {'topic': topic, 'overrides': overrides or {}}, url)
+
+def get_job(job_id: str, url: str = None) -> dict:
+    return _call('GET', f'/jobs/{job_id}', url=url)
+
+def wait_for_job(job_id: str, url: str = None, poll_seconds: float = None) -> dict:
+    """Poll a job until it is done or failed"""
+    while True:
+        job = get_job(job_id, url)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(poll_seconds or config.DAEMON_POLL_SECONDS)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render daemon with a localhost job API")
+    parser.add_argument("--host", help="Address to bind (default DAEMON_HOST)")
+    parser.add_argument("--port", type=int, help="Port to bind (default DAEMON_PORT)")
+    parser.add_argument("--concurrency", type=int, help="Jobs rendered at once")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.concurrency)
+    host, port = server.server_address[:2]
+    print(f"Render daemon listening on http://{host}:{port}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("Render daemon stopped.")
@@ -0,0 +1,144 @@
+"""
+Small dependency-graph executor for pipeline stages.
+Stages declare the values they consume and produce; every stage whose inputs
+are ready runs concurrently, and a failure cancels everything downstream.
+"""
+
+import contextvars
+import cProfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Profilers for stages run while profile_stages() is active; cProfile only
+# sees the thread it was enabled in, so each stage thread gets its own
+_stage_profiles = None
+
+@contextmanager
+def profile_stages():
+    """Profile every stage run inside the block; yields the list of profilers"""
+    global _stage_profiles
+    previous, _stage_profiles = _stage_profiles, []
+    try:
+        yield _stage_profiles
+    finally:
+        _stage_profiles = previous
+
+class Stage:
+    """A named unit of work: func(**inputs) returns its output(s)
+
+    A stage with several outputs returns a tuple with one value per output;
+    a stage with one output may return the bare value.
+    """
+
+    def __init__(self, name: str, func, inputs=(), outputs=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def run(self, values: dict) -> dict:
+        kwargs = {name: values[name] for name in self.inputs}
+        profiles = _stage_profiles
+        if profiles is None:
+            result = self.func(**kwargs)
+        else:
+            profiler = cProfile.Profile()
+            profiles.append(profiler)
+            result = profiler.runcall(self.func, **kwargs)
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1 and not isinstance(result, tuple):
+            result = (result,)
+        if not isinstance(result, tuple) or len(result) != len(self.outputs):
+            got = f"{len(result)} value(s)" if isinstance(result, tuple) else type(result).__name__
+            raise ValueError(f"Stage '{self.name}' must return {len(self.outputs)} value(s) "
+                             f"for {list(self.outputs)}, got {got}")
+        return dict(zip(self.outputs, result))
+
+def _validate(stages: list, initial: dict) -> dict:
+    """Map every value to the stage producing it and reject unknown inputs"""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers or output in initial:
+                raise ValueError(f"Value '{output}' is produced more than once")
+            producers[output] = stage
+    for stage in stages:
+        for name in stage.inputs:
+            if name not in producers and name not in initial:
+                raise ValueError(f"Stage '{stage.name}' needs '{name}', which nothing produces")
+    return producers
+
+def critical_path(stages: list, report: dict, producers: dict) -> list:
+    """Walk back from the last stage to finish through its latest-finishing inputs"""
+    finished = [s for s in stages if report[s.name]['status'] == 'ok']
+    if not finished:
+        return []
+    stage = max(finished, key=lambda s: report[s.name]['end'])
+    path = []
+    while stage is not None:
+        path.append(stage.name)
+        upstream = [producers[name] for name in stage.inputs if name in producers]
+        stage = max(upstream, key=lambda s: report[s.name]['end'], default=None)
+    return list(reversed(path))
+
+def run_dag(stages: list, initial: dict = None, max_workers: int = None) -> tuple:
+    """Run stages as soon as their inputs exist; return (values, report)
+
+    The report maps each stage name to its status ('ok', 'failed' or
+    'cancelled') and timings, plus 'critical_path' and 'total_seconds'.
+    The first stage failure is re-raised once running stages have settled.
+    """
+    values = dict(initial or {})
+    producers = _validate(stages, values)
+    report = {s.name: {'status': 'pending'} for s in stages}
+    pending = list(stages)
+    running = {}
+    failure = None
+    origin = time.perf_counter()
+
+    def cancel_dependents(failed_stage):
+        lost = set(failed_stage.outputs)
+        changed = True
+        while changed:
+            changed = False
+            for stage in list(pending):
+                if lost.intersection(stage.inputs):
+                    pending.remove(stage)
+                    report[stage.name]['status'] = 'cancelled'
+                    lost.update(stage.outputs)
+                    changed = True
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            for stage in [s for s in pending if all(name in values for name in s.inputs)]:
+                pending.remove(stage)
+                report[stage.name]['start'] = time.perf_counter() - origin
+                # Each stage sees the caller's context variables (e.g. the telemetry run)
+                running[pool.submit(contextvars.copy_context().run, stage.run, values)] = stage
+
+            if not running:
+                raise ValueError(f"Stages can never run (cycle?): {[s.name for s in pending]}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                entry = report[stage.name]
+                entry['end'] = time.perf_counter() - origin
+                entry['seconds'] = entry['end'] - entry['start']
+                try:
+                    values.update(future.result())
+                    entry['status'] = 'ok'
+                except Exception as e:
+                    entry['status'] = 'failed'
+                    entry['error'] = f"{type(e).__name__}: {e}"
+                    failure = failure or e
+                    cancel_dependents(stage)
+
+    report['critical_path'] = critical_path(stages, report, producers)
+    report['total_seconds'] = time.perf_counter() - origin
+    if failure is not None:
+        failure.dag_report = report
+        raise failure
+    return values, report
@@ -0,0 +1,183 @@
+"""
+Near-duplicate index for the YouTube Shorts Bot.
+Every rendered script is fingerprinted with a MinHash signature over word
+bigrams and filed under LSH band buckets in SQLite, so a new script is
+compared only against the few past scripts that share a bucket.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import config
+
+MINHASH_PERMUTATIONS = 120
+LSH_BAND_ROWS = 3  # 40 bands: scripts with Jaccard 0.5 share a bucket 99.5% of the time
+SHINGLE_WORDS = 2
+
+# Multiply-shift hash family; the fixed seed keeps new signatures comparable with stored ones
+_rng = np.random.default_rng(1770)
+_A = _rng.integers(0, 1 << 64, size=MINHASH_PERMUTATIONS, dtype=np.uint64, endpoint=False) | np.uint64(1)
+_B = _rng.integers(0, 1 << 64, size=MINHASH_PERMUTATIONS, dtype=np.uint64, endpoint=False)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    script TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    script_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, script_id)
+) WITHOUT ROWID;
+"""
+
+class DuplicateScriptError(ValueError):
+    """Raised when every attempt produced a near-duplicate of a past script"""
+
+def shingles(text: str) -> set:
+    """Lower-cased word n-grams, ignoring punctuation"""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature: the minimum of each hash permutation over the shingles"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+         for shingle in shingles(text)),
+        dtype=np.uint64
+    )
+    if hashes.size == 0:
+        return np.full(MINHASH_PERMUTATIONS, 0xFFFFFFFF, dtype=np.uint32)
+    # (a * h + b) mod 2^64, keeping the well-mixed top 32 bits
+    permuted = (np.outer(hashes, _A) + _B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+def band_buckets(sig: np.ndarray) -> list:
+    """One signed 64-bit bucket id per band of LSH_BAND_ROWS signature values"""
+    bands = sig.reshape(-1, LSH_BAND_ROWS)
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([i]) + band.tobytes(), digest_size=8).digest(), 'big', signed=True)
+        for i, band in enumerate(bands)
+    ]
+
+class ContentIndex:
+    """Persistent MinHash/LSH index of past topics and scripts"""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.DEDUP_INDEX_DB
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def find(self, script: str, threshold: float = None) -> dict:
+        """Return the most similar past script at or above threshold, or None
+
+        Only scripts sharing at least one band bucket are compared; similarity
+        is the fraction of matching signature values (estimated Jaccard).
+        """
+        threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        sig = signature(script)
+        buckets = band_buckets(sig)
+        with self.lock:
+            ids = [row[0] for row in self.conn.execute(
+                f"SELECT DISTINCT script_id FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))})",
+                buckets
+            )]
+            if not ids:
+                return None
+            rows = self.conn.execute(
+                f"SELECT id, signature FROM scripts WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+            candidates = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+            similarity = (candidates == sig).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] < threshold:
+                return None
+            match_id = rows[best][0]
+            topic, past_script = self.conn.execute(
+                "SELECT topic, script FROM scripts WHERE id = ?", (match_id,)
+            ).fetchone()
+        return {'id': match_id, 'topic': topic, 'script': past_script, 'similarity': float(similarity[best])}
+
+    def add(self, topic: str, script: str) -> int:
+        """Record a script; returns its id (the existing one if already recorded for topic)"""
+        sig = signature(script)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self.conn.execute(
+                    "SELECT id FROM scripts WHERE topic = ? AND script = ?", (topic, script)
+                ).fetchone()
+                if existing:
+                    self.conn.execute("COMMIT")
+                    return existing[0]
+                script_id = self.conn.execute(
+                    "INSERT INTO scripts (topic, script, signature, created_at) VALUES (?, ?, ?, ?)",
+                    (topic, script, sig.tobytes(), time.time())
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO buckets (bucket, script_id) VALUES (?, ?)",
+                    [(bucket, script_id) for bucket in band_buckets(sig)]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return script_id
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM scripts").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Return the process-wide index, or None when deduplication is disabled"""
+    global _index
+    if not config.DEDUP_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = ContentIndex()
+        return _index
+
+def record_script(topic: str, script: str):
+    """Remember a published script so later near-duplicates are caught"""
+    index = get_index()
+    if index:
+        index.add(topic, script)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the near-duplicate script index")
+    parser.add_argument("--check", metavar="FILE", help="Look up the script in FILE")
+    args = parser.parse_args()
+
+    index = ContentIndex()
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            match = index.find(f.read())
+        if match:
+            print(f"Near-duplicate of #{match['id']} '{match['topic']}' ({match['similarity']:.0%} similar)")
+        else:
+            print("No near-duplicate found")
+    else:
+        print(f"{index.count()} scripts indexed in {index.path}")
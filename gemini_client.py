@@ -0,0 +1,191 @@
+"""
+Shared Gemini layer for the YouTube Shorts Bot.
+One client per process behind token-bucket rate limits (requests and tokens
+per minute), per-call timeouts, jittered retries on 429/5xx and transport
+errors, and a circuit breaker that fails fast while the API is down.
+"""
+
+import random
+import threading
+import time
+
+import config
+import telemetry
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+CHARS_PER_TOKEN = 4  # Rough prompt size estimate used before the real count is known
+
+_client = None
+_client_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'calls': 0,
+    'tokens': 0,
+    'retries': 0,
+    'throttle_seconds': 0.0,
+    'breaker_rejections': 0
+}
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+def _count(name: str, amount: float = 1):
+    with _stats_lock:
+        _stats[name] += amount
+    telemetry.count(f'gemini.{name}', amount)
+
+def get_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+def get_client():
+    """Return the process-wide Gen AI client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            http_options = {'timeout': int(config.GEMINI_TIMEOUT * 1000)}  # milliseconds
+            if config.GEMINI_BASE_URL:
+                http_options['base_url'] = config.GEMINI_BASE_URL
+            _client = genai.Client(api_key=config.GEMINI_API_KEY, http_options=http_options)
+        return _client
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to one minute's worth"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount is available and take it; returns seconds waited"""
+        amount = min(amount, self.capacity)  # A single oversized call still gets through
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float):
+        """Charge (or refund) the difference once the real cost is known; may go into debt"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+class CircuitBreaker:
+    """Opens after threshold consecutive failures; lets one trial call through after reset_seconds"""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining <= 0 and not self.trial_running:
+                self.trial_running = True  # Half-open: this caller probes the API
+                return
+        _count('breaker_rejections')
+        raise CircuitOpenError(
+            f"Gemini circuit open after {self.failures} consecutive failures; "
+            f"retrying in {max(remaining, 0):.0f}s"
+        )
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial_running:
+                    print(f"🔌 Gemini circuit opened for {self.reset_seconds:.0f}s "
+                          f"after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+request_bucket = TokenBucket(config.GEMINI_REQUESTS_PER_MINUTE)
+token_bucket = TokenBucket(config.GEMINI_TOKENS_PER_MINUTE)
+breaker = CircuitBreaker(config.GEMINI_BREAKER_THRESHOLD, config.GEMINI_BREAKER_RESET_SECONDS)
+
+def is_retriable(error: Exception) -> bool:
+    """429/5xx API errors, timeouts and dropped connections are worth retrying"""
+    if getattr(error, 'code', None) in RETRY_STATUS_CODES:
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, config.GEMINI_BACKOFF_BASE * (2 ** attempt))
+
+def generate_content(model: str, contents: str, output_tokens: int = None, **kwargs):
+    """Call models.generate_content within the rate limits, retrying transient failures
+
+    output_tokens is the expected reply size, reserved from the token budget
+    with the prompt until the response reports the real count. Raises
+    CircuitOpenError without calling the API while the breaker is open.
+    """
+    estimate = len(contents) // CHARS_PER_TOKEN + (output_tokens or config.GEMINI_OUTPUT_TOKENS)
+    client = get_client()
+
+    for attempt in range(config.GEMINI_MAX_RETRIES + 1):
+        breaker.before_call()
+        waited = request_bucket.acquire() + token_bucket.acquire(estimate)
+        if waited:
+            _count('throttle_seconds', waited)
+
+        try:
+            with telemetry.span('gemini.generate', model=model, attempt=attempt,
+                                throttle_seconds=waited) as attrs:
+                response = client.models.generate_content(model=model, contents=contents, **kwargs)
+                usage = getattr(response, 'usage_metadata', None)
+                tokens = getattr(usage, 'total_token_count', None) or 0
+                attrs['tokens'] = tokens
+        except Exception as e:
+            if not is_retriable(e):
+                breaker.record_success()  # The API answered; the request itself was bad
+                raise
+            breaker.record_failure()
+            if attempt == config.GEMINI_MAX_RETRIES:
+                raise
+            _count('retries')
+            delay = _backoff_delay(attempt)
+            print(f"⚠️ Gemini call failed ({e}); retry {attempt + 1}/{config.GEMINI_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        _count('calls')
+        _count('tokens', tokens)
+        if tokens:
+            token_bucket.adjust(tokens - estimate)
+        return response
@@ -0,0 +1,146 @@
+"""
+Shared HTTP layer for the YouTube Shorts Bot.
+One pooled keep-alive session with timeouts, jittered retries on 429/5xx,
+streaming downloads and ETag revalidation for repeated queries.
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import telemetry
+from cache import ArtifactCache, get_cache
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_etags = {}  # Used when the artifact cache is disabled
+
+_stats_lock = threading.Lock()
+_stats = {
+    'requests': 0,
+    'retries': 0,
+    'not_modified': 0,
+    'bytes_downloaded': 0
+}
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+    telemetry.count(f'http.{name}', amount)
+
+def get_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=config.HTTP_POOL_SIZE,
+                pool_maxsize=config.HTTP_POOL_SIZE
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def _backoff_delay(attempt: int, response=None):
+    """Exponential backoff with full jitter, honouring Retry-After when given
+
+    Waits are capped at HTTP_MAX_BACKOFF; returns None when the server asks
+    for a longer wait than that, meaning the request should give up.
+    """
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        retry_after = float(response.headers['Retry-After'])
+        return retry_after if retry_after <= config.HTTP_MAX_BACKOFF else None
+    return min(random.uniform(0, config.HTTP_BACKOFF_BASE * (2 ** attempt)), config.HTTP_MAX_BACKOFF)
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request with timeouts, retrying connection errors, 429 and 5xx"""
+    kwargs.setdefault('timeout', (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT))
+    session = get_session()
+
+    for attempt in range(config.HTTP_MAX_RETRIES + 1):
+        _count('requests')
+        try:
+            with telemetry.span('http.request', method=method, url=url.split('?')[0], attempt=attempt) as attrs:
+                response = session.request(method, url, **kwargs)
+                attrs['status'] = response.status_code
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == config.HTTP_MAX_RETRIES:
+                raise
+            _count('retries')
+            time.sleep(_backoff_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < config.HTTP_MAX_RETRIES:
+            delay = _backoff_delay(attempt, response)
+            if delay is not None:
+                response.close()
+                _count('retries')
+                time.sleep(delay)
+                continue
+            print(f"⚠️ {url.split('?')[0]} asked to retry after {response.headers['Retry-After']}s "
+                  f"(max {config.HTTP_MAX_BACKOFF}s); giving up")
+
+        response.raise_for_status()
+        return response
+
+def get_json(url: str, params: dict = None, headers: dict = None):
+    """GET a JSON document, revalidating a previous response with If-None-Match"""
+    cache = get_cache()
+    key = ArtifactCache.make_key('http', url=url, params=params)
+    previous = None
+    if cache:
+        stored = cache.get_text(key)
+        previous = json.loads(stored) if stored else None
+    else:
+        previous = _etags.get(key)
+
+    headers = dict(headers or {})
+    if previous:
+        headers['If-None-Match'] = previous['etag']
+
+    response = request('GET', url, params=params, headers=headers)
+    if response.status_code == 304 and previous:
+        _count('not_modified')
+        return previous['body']
+
+    _count('bytes_downloaded', len(response.content))
+    body = response.json()
+    etag = response.headers.get('ETag')
+    if etag:
+        entry = {'etag': etag, 'body': body}
+        if cache:
+            cache.put_text(key, json.dumps(entry))
+        else:
+            _etags[key] = entry
+    return body
+
+def download_file(url: str, output_path: str, headers: dict = None) -> str:
+    """Stream a response body to disk in chunks, replacing output_path atomically"""
+    output_dir = os.path.dirname(output_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.part')
+    try:
+        with request('GET', url, headers=headers, stream=True) as response, os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=config.HTTP_CHUNK_SIZE):
+                f.write(chunk)
+                _count('bytes_downloaded', len(chunk))
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
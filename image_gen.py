@@ -1,7 +1,9 @@
-import requests
 import os
 import config
 from PIL import Image
+from cache import ArtifactCache, get_cache
+
+PREPARED_FRAME_SUFFIX = '.ppm'  # Binary PPM: raw RGB behind a tiny header
 
 def get_background_image(topic: str, output_path: str) -> str:
     """Get background image from Pexels API"""
@@ -12,43 +14,55 @@ def get_background_image(topic: str, output_path: str) -> str:
 
 def fetch_pexels_image(topic: str, output_path: str) -> str:
     """Fetch image from Pexels API"""
+    try:
+        cache = get_cache()
+        if cache:
+            cache_key = ArtifactCache.make_key(
+                'image',
+                topic=topic,
+                source='pexels',
+                orientation=config.IMAGE_SEARCH_ORIENTATION,
+                quality=config.IMAGE_QUALITY,
+                width=config.VIDEO_WIDTH,
+                height=config.VIDEO_HEIGHT
+            )
+            return cache.fetch_file(
+                cache_key, output_path, lambda path: download_pexels_image(topic, path), '.jpg'
+            )
+        return download_pexels_image(topic, output_path)
+        
+    except LookupError:
+        print("No images found, using default")
+        return create_default_image(topic, output_path)
+    except Exception as e:
+        print(f"Error fetching Pexels image: {e}")
+        return create_default_image(topic, output_path)
+
+def download_pexels_image(topic: str, output_path: str) -> str:
+    """Download the top Pexels result, raising LookupError if there is none"""
+    import http_client
+    
     headers = {
         'Authorization': config.PEXELS_API_KEY
     }
     
     # Search for images
-    search_url = f"https://api.pexels.com/v1/search"
+    search_url = f"{config.PEXELS_API_URL}/search"
     params = {
         'query': topic,
         'per_page': 1,
-        'orientation': 'portrait'  # Better for vertical video
+        'orientation': config.IMAGE_SEARCH_ORIENTATION  # Better for vertical video
     }
     
-    try:
-        response = requests.get(search_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        if data['photos']:
-            image_url = data['photos'][0]['src']['large']
-            
-            # Download image
-            img_response = requests.get(image_url)
-            img_response.raise_for_status()
-            
-            with open(output_path, 'wb') as f:
-                f.write(img_response.content)
-                
-            # Resize to video dimensions
-            resize_image_for_video(output_path)
-            return output_path
-        else:
-            print("No images found, using default")
-            return create_default_image(topic, output_path)
-            
-    except Exception as e:
-        print(f"Error fetching Pexels image: {e}")
-        return create_default_image(topic, output_path)
+    data = http_client.get_json(search_url, params=params, headers=headers)
+    if not data['photos']:
+        raise LookupError(f"No Pexels images found for {topic}")
+    
+    image_url = data['photos'][0]['src'][config.IMAGE_QUALITY]
+    
+    # Stream the image straight to disk; prepare_frame does the only resample
+    http_client.download_file(image_url, output_path)
+    return output_path
 
 def create_default_image(topic: str, output_path: str) -> str:
     """Create a simple default background image"""
@@ -78,12 +92,63 @@ def create_default_image(topic: str, output_path: str) -> str:
     img.save(output_path)
     return output_path
 
+def fit_to_frame(img, width: int = None, height: int = None):
+    """Scale and center-crop an image to cover the frame without distorting it"""
+    from PIL import ImageOps
+
+    size = (width or config.VIDEO_WIDTH, height or config.VIDEO_HEIGHT)
+    return ImageOps.fit(img.convert('RGB'), size, Image.Resampling.LANCZOS)
+
+def pad_to_frame(img, width: int = None, height: int = None):
+    """Scale an image to fit inside the frame and center it on black bars"""
+    from PIL import ImageOps
+
+    size = (width or config.VIDEO_WIDTH, height or config.VIDEO_HEIGHT)
+    return ImageOps.pad(img.convert('RGB'), size, Image.Resampling.LANCZOS, color=(0, 0, 0))
+
 def resize_image_for_video(image_path: str):
     """Resize image to fit video dimensions"""
     with Image.open(image_path) as img:
-        # Resize to video dimensions while maintaining aspect ratio
-        img = img.resize((config.VIDEO_WIDTH, config.VIDEO_HEIGHT), Image.Resampling.LANCZOS)
-        img.save(image_path)
+        # Cover-crop to video dimensions while maintaining aspect ratio
+        img = fit_to_frame(img)
+    img.save(image_path)
+
+def is_prepared_frame(path: str) -> bool:
+    return path.endswith(PREPARED_FRAME_SUFFIX)
+
+def prepare_frame(image_path: str, frame_path: str) -> str:
+    """Decode and resample the background once into an uncompressed frame at output size
+
+    The renderer reads the result directly (ffmpeg as an image, NumPy as a
+    memory map), so no further decode, resample or lossy re-encode happens.
+    """
+    with Image.open(image_path) as img:
+        frame = fit_to_frame(img)
+    frame.save(frame_path, format='PPM')
+    return frame_path
+
+def load_prepared_frame(frame_path: str):
+    """Memory-map a prepared frame as a read-only (height, width, 3) uint8 array"""
+    import numpy as np
+
+    with open(frame_path, 'rb') as f:
+        # Header: magic, width, height, maxval, each followed by one whitespace byte
+        fields = []
+        while len(fields) < 4:
+            token = b''
+            char = f.read(1)
+            while char.isspace():
+                char = f.read(1)
+            while char and not char.isspace():
+                token += char
+                char = f.read(1)
+            fields.append(token)
+        offset = f.tell()
+
+    if fields[0] != b'P6' or fields[3] != b'255':
+        raise ValueError(f"{frame_path} is not an 8-bit binary PPM frame")
+    width, height = int(fields[1]), int(fields[2])
+    return np.memmap(frame_path, dtype=np.uint8, mode='r', offset=offset, shape=(height, width, 3))
 
 if __name__ == "__main__":
     # Test image generation
@@ -1,36 +1,27 @@
 import argparse
 import os
 import sys
-from pathlib import Path
+
+# Import name -> pip package, checked without importing anything heavy
+REQUIRED_MODULES = {
+    'google.genai': 'google-genai',
+    'gtts': 'gtts',
+    'moviepy': 'moviepy',
+    'PIL': 'Pillow',
+    'requests': 'requests'
+}
 
 def check_dependencies():
     """Check if all required dependencies are available"""
-    missing_deps = []
-    
-    try:
-        import google.generativeai
-    except ImportError:
-        missing_deps.append('google-generativeai')
-    
-    try:
-        import gtts
-    except ImportError:
-        missing_deps.append('gtts')
+    from importlib.util import find_spec
     
-    try:
-        import moviepy.editor
-    except ImportError:
-        missing_deps.append('moviepy')
-    
-    try:
-        from PIL import Image
-    except ImportError:
-        missing_deps.append('Pillow')
-    
-    try:
-        import requests
-    except ImportError:
-        missing_deps.append('requests')
+    missing_deps = []
+    for module, package in REQUIRED_MODULES.items():
+        try:
+            if find_spec(module) is None:
+                missing_deps.append(package)
+        except ImportError:  # Parent package missing (e.g. no 'google')
+            missing_deps.append(package)
     
     if missing_deps:
         print(f"❌ Missing dependencies: {', '.join(missing_deps)}")
@@ -41,43 +32,143 @@ def check_dependencies():
 
 def main():
     """Main function with proper error handling"""
+    # Parse arguments first so --help never pays for the pipeline imports
+    parser = argparse.ArgumentParser(description="AI-Powered YouTube Shorts Bot")
+    parser.add_argument("--topic", type=str, help="Topic for the video")
+    parser.add_argument("--topics-file", type=str, help="Render every topic in this file (one per line)")
+    parser.add_argument("--profile", action="store_true", help="Profile the run and write a report next to the video")
+    parser.add_argument("--submit", action="store_true", help="Send the job to a running daemon.py instead of rendering here")
+    parser.add_argument("--wait", action="store_true", help="With --submit, wait for the job to finish")
+    args = parser.parse_args()
+    
+    # Hand the job to the warm daemon; the client needs only the standard library
+    if args.submit:
+        from daemon import submit_job, wait_for_job
+        job = submit_job(args.topic)
+        print(f"📨 Submitted job {job['id']} to the render daemon")
+        if args.wait:
+            job = wait_for_job(job['id'])
+            print(f"{'✅' if job['status'] == 'done' else '❌'} Job {job['id']} {job['status']}: "
+                  f"{job.get('artifacts') or job.get('error')}")
+            if job['status'] != 'done':
+                sys.exit(1)
+        return
+    
     print("🚀 Starting YouTube Shorts Bot Pipeline...")
     
     # Check dependencies first
     if not check_dependencies():
         sys.exit(1)
     
-    # Now import our modules after dependency check
-    try:
-        from script_gen import generate_script
-        from voice_gen import generate_voice
-        from image_gen import get_background_image
-        from video_gen import create_video
-        from upload_youtube import upload_to_youtube
-        from utils import clean_temp_files, setup_directories
-        import config
-    except ImportError as e:
-        print(f"❌ Failed to import modules: {e}")
-        sys.exit(1)
-    
-    # Parse arguments
-    parser = argparse.ArgumentParser(description="AI-Powered YouTube Shorts Bot")
-    parser.add_argument("--topic", type=str, help="Topic for the video")
-    args = parser.parse_args()
+    # Run a batch of topics
+    if args.topics_file:
+        from batch import run_batch, read_topics_file
+        report = run_batch(read_topics_file(args.topics_file))
+        if any(job['status'] != 'ok' for job in report):
+            sys.exit(1)
+        return
     
     # Run the pipeline
-    run_full_pipeline(args.topic)
+    if args.profile:
+        run_profiled(args.topic)
+    else:
+        run_full_pipeline(args.topic)
 
-def run_full_pipeline(topic: str = None):
-    """Run the complete YouTube Shorts creation pipeline"""
-    # Import here to avoid import issues
-    from script_gen import generate_script
-    from voice_gen import generate_voice
-    from image_gen import get_background_image
-    from video_gen import create_video
+def run_profiled(topic: str = None):
+    """Run the pipeline under cProfile and write the stats next to the video
+
+    Stages run on worker threads, so each stage is profiled in its own thread
+    and the results are merged with the main thread's.
+    """
+    import cProfile
+    import pstats
+    import config
+    from dag import profile_stages
+    
+    profiler = cProfile.Profile()
+    video_path = None
+    with profile_stages() as stage_profiles:
+        try:
+            video_path = profiler.runcall(run_full_pipeline, topic)
+        finally:
+            report_base = os.path.splitext(video_path)[0] if video_path else os.path.join(config.TEMP_DIR, 'profile')
+            stats = pstats.Stats(profiler)
+            for stage_profiler in stage_profiles:
+                stats.add(stage_profiler)
+            stats.dump_stats(report_base + '.prof')
+            with open(report_base + '.profile.txt', 'w') as f:
+                stats.stream = f
+                stats.sort_stats('cumulative').print_stats(50)
+            print(f"🔬 Profile written to {report_base}.profile.txt ({report_base}.prof for snakeviz/pstats)")
+
+def script_path(video_path: str) -> str:
+    """Where an unpublished video's script is kept until it is published (beside the video)"""
+    return os.path.splitext(video_path)[0] + '.script.txt'
+
+def record_published(video_path: str, topic: str, script: str = None):
+    """Add a published video's script to the duplicate index, so later topics can't repeat it
+
+    script defaults to the one saved beside the video at render time.
+    """
+    from dedup import record_script
+    
+    sidecar = script_path(video_path)
+    if script is None and os.path.exists(sidecar):
+        with open(sidecar, encoding='utf-8') as f:
+            script = f.read()
+    if script:
+        record_script(topic, script)
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+
+def publish_video(video_path: str, topic: str, script: str = None) -> str:
+    """Upload (or queue) a finished video; returns where the video now lives
+
+    Only published (or queued) scripts are recorded for duplicate checks, so
+    test renders and unpublished re-renders never block a script.
+    """
+    import config
+    import telemetry
+    
+    title = f"{topic} - AI Generated Short"
+    description = f"An AI-generated short video about {topic}\n\n#shorts #ai #automation"
+    
+    if config.UPLOAD_QUEUE_ENABLED:
+        # Hand off to the upload worker; the video leaves its current directory
+        from upload_queue import enqueue
+        queued_path = enqueue(video_path, title, description)['video_path']
+        record_published(video_path, topic, script)
+        return queued_path
+    
+    # Check if YouTube credentials exist
+    if not os.path.exists('credentials/client_secrets.json'):
+        print("⚠️ YouTube credentials not found. Skipping upload.")
+        print("To enable uploads, add credentials/client_secrets.json")
+        return video_path
+    
     from upload_youtube import upload_to_youtube
-    from utils import clean_temp_files, setup_directories
+    print("📤 Uploading to YouTube...")
+    with telemetry.span('stage.upload', bytes_sent=os.path.getsize(video_path)):
+        upload_to_youtube(video_path, title, description)
+    record_published(video_path, topic, script)
+    print("✅ Video uploaded to YouTube!")
+    return video_path
+
+def run_full_pipeline(topic: str = None, upload: bool = None, render_engine: str = None,
+                      output_path: str = None, encoding_profile: str = None):
+    """Run the complete YouTube Shorts creation pipeline
+
+    upload, render_engine and encoding_profile override
+    config.UPLOAD_TO_YOUTUBE, config.RENDER_ENGINE and config.ENCODING_PROFILE
+    for this run only. Intermediates live in a private
+    workspace; the finished video goes to output_path (by default a file
+    named after the workspace in VIDEO_OUTPUT_DIR).
+    """
+    # Stage modules (and their SDKs) are imported by the stage that needs them
+    from utils import Workspace, setup_directories
+    from dag import Stage, run_dag
     import config
+    import telemetry
     
     # Setup directories
     setup_directories()
@@ -85,57 +176,99 @@ def run_full_pipeline(topic: str = None):
     # Use default topic if none provided
     if not topic:
         topic = config.DEFAULT_TOPIC
+    if upload is None:
+        upload = config.UPLOAD_TO_YOUTUBE
+    
+    # Private directory, so concurrent runs never touch each other's files
+    workspace = Workspace()
+    # Own telemetry run, so daemon and scheduler jobs each summarize only themselves
+    run_token = telemetry.start_run()
+    if not output_path:
+        output_path = os.path.join(config.VIDEO_OUTPUT_DIR, f"{workspace.name}.mp4")
     
     try:
         # Step 1: Generate script
-        print(f"📝 Generating script for topic: {topic}")
-        script = generate_script(topic)
-        if not script or len(script) < 20:
-            raise ValueError("Generated script is too short or empty")
-        print(f"✅ Script generated ({len(script.split())} words): {script[:100]}...")
+        def script_stage(topic):
+            from script_gen import ensure_unique, generate_script
+            print(f"📝 Generating script for topic: {topic}")
+            script = generate_script(topic)
+            if not script or len(script) < 20:
+                raise ValueError("Generated script is too short or empty")
+            script = ensure_unique(topic, script)
+            print(f"✅ Script generated ({len(script.split())} words): {script[:100]}...")
+            return script
         
-        # Step 2: Generate voice narration
-        print("🗣️ Converting script to voice...")
-        audio_path = generate_voice(script, config.TEMP_AUDIO_PATH)
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Audio file not created at {audio_path}")
-        print(f"✅ Voice generated: {audio_path}")
+        # Step 2: Generate voice narration (segmented voice also times each sentence)
+        def voice_stage(script):
+            from voice_gen import generate_voice, generate_voice_segmented
+            print("🗣️ Converting script to voice...")
+            sentence_durations = None
+            if config.VOICE_SEGMENTED:
+                audio_path, sentence_durations = generate_voice_segmented(script, workspace.audio_path)
+            else:
+                audio_path = generate_voice(script, workspace.audio_path)
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"Audio file not created at {audio_path}")
+            print(f"✅ Voice generated: {audio_path}")
+            return audio_path, sentence_durations
         
-        # Step 3: Get background image
-        print("🖼️ Fetching background image...")
-        image_path = get_background_image(topic, config.TEMP_IMAGE_PATH)
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not created at {image_path}")
-        print(f"✅ Image ready: {image_path}")
+        # Step 3: Get background image (depends only on the topic)
+        def image_stage(topic):
+            from image_gen import get_background_image, prepare_frame
+            print("🖼️ Fetching background image...")
+            image_path = get_background_image(topic, workspace.image_path)
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image file not created at {image_path}")
+            frame_path = prepare_frame(image_path, workspace.frame_path)
+            print(f"✅ Image ready: {frame_path}")
+            return frame_path
         
         # Step 4: Create video
-        print("🎬 Creating video...")
-        video_path = create_video(image_path, audio_path, config.TEMP_VIDEO_PATH)
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"Video file not created at {video_path}")
+        def video_stage(frame_path, audio_path, script, sentence_durations):
+            from video_gen import render_short
+            print("🎬 Creating video...")
+            # Render inside the workspace (moviepy's temp audio lands there too)
+            return render_short(frame_path, audio_path, output_path, script, sentence_durations,
+                                image_path=workspace.image_path, work_path=workspace.video_path,
+                                engine=render_engine, profile=encoding_profile)
+        
+        # Independent stages (script and image fetch) run concurrently
+        values, report = run_dag([
+            Stage('script', telemetry.traced('stage.script', script_stage), inputs=['topic'], outputs=['script']),
+            Stage('voice', telemetry.traced('stage.voice', voice_stage),
+                  inputs=['script'], outputs=['audio_path', 'sentence_durations']),
+            Stage('image', telemetry.traced('stage.image', image_stage), inputs=['topic'], outputs=['frame_path']),
+            Stage('video', telemetry.traced('stage.video', video_stage),
+                  inputs=['frame_path', 'audio_path', 'script', 'sentence_durations'], outputs=['video_path'])
+        ], {'topic': topic})
+        video_path = values['video_path']
+        critical = ' → '.join(
+            f"{name} {report[name]['seconds']:.1f}s" for name in report['critical_path']
+        )
+        print(f"⏱️ Critical path ({report['total_seconds']:.1f}s): {critical}")
         
         # Get video file size
         video_size = os.path.getsize(video_path) / (1024 * 1024)  # MB
         print(f"✅ Video created: {video_path} ({video_size:.1f} MB)")
         
         # Step 5: Upload to YouTube
-        if config.UPLOAD_TO_YOUTUBE:
-            print("📤 Uploading to YouTube...")
-            title = f"{topic} - AI Generated Short"
-            description = f"An AI-generated short video about {topic}\n\n#shorts #ai #automation"
-            
-            # Check if YouTube credentials exist
-            if not os.path.exists('credentials/client_secrets.json'):
-                print("⚠️ YouTube credentials not found. Skipping upload.")
-                print("To enable uploads, add credentials/client_secrets.json")
-            else:
-                upload_to_youtube(video_path, title, description)
-                print("✅ Video uploaded to YouTube!")
+        if upload:
+            video_path = publish_video(video_path, topic, values['script'])
         else:
+            # Kept for a later publish_video (e.g. the scheduler's pre-render buffer)
+            with open(script_path(video_path), 'w', encoding='utf-8') as f:
+                f.write(values['script'])
             print("⏭️ Skipping YouTube upload (disabled in config)")
         
+        from cache import get_cache
+        cache = get_cache()
+        if cache:
+            stats = cache.stats()
+            print(f"📦 Cache: {stats['hits']} hits, {stats['misses']} misses")
+        
         print("🎉 Pipeline completed successfully!")
         print(f"📁 Video saved at: {video_path}")
+        return video_path
         
     except Exception as e:
         print(f"❌ Pipeline failed: {str(e)}")
@@ -149,10 +282,13 @@ def run_full_pipeline(topic: str = None):
         raise
     
     finally:
-        # Clean up temporary files
+        telemetry.print_summary()
+        telemetry.end_run(run_token)
+        
+        # Clean up this run's temporary files
         if hasattr(config, 'CLEAN_TEMP_FILES') and config.CLEAN_TEMP_FILES:
             print("🧹 Cleaning up temporary files...")
-            clean_temp_files()
+            workspace.cleanup()
 
 if __name__ == "__main__":
     main()
@@ -1,34 +1,324 @@
+import json
+import os
+import threading
+from collections import deque
 import schedule
 import time
-from main import run_full_pipeline
+from datetime import datetime, timedelta
+from main import run_full_pipeline, publish_video, script_path
+from daemon import submit_job, wait_for_job
+from utils import probe_duration
 import config
 
+TOPICS = [
+    "Why bridges have expansion joints",
+    "How skyscrapers stay upright in wind",
+    "The engineering behind tunnels",
+    "Why roads crack in winter",
+    "How elevators work safely"
+]
+
+# Pipeline stages and the stages they wait for
+STAGE_DEPENDENCIES = {
+    'stage.script': [],
+    'stage.voice': ['stage.script'],
+    'stage.image': [],
+    'stage.video': ['stage.voice', 'stage.image']
+}
+
+BUFFER_MANIFEST = 'buffer.json'
+
+_buffer_lock = threading.Lock()
+_render_lock = threading.Lock()  # One pre-render at a time; publishing waits for it
+
+# Stage timings read so far from the metrics file, and where reading stopped
+_estimate_lock = threading.Lock()
+_estimate_state = {'offset': 0, 'samples': None}
+
+def render_topic(topic: str, output_path: str) -> str:
+    """Render one video without publishing it, in-process or on the daemon"""
+    if config.SCHEDULER_USE_DAEMON:
+        job = submit_job(topic, {'upload': False, 'output_path': output_path})
+        job = wait_for_job(job['id'])
+        if job['status'] != 'done':
+            raise RuntimeError(f"Daemon job {job['id']} failed: {job['error']}")
+        return job['artifacts']['video_path']
+    return run_full_pipeline(topic, upload=False, output_path=output_path)
+
+def validate_video(video_path: str) -> float:
+    """Check a rendered video is playable and of a sensible length; returns its duration"""
+    if not os.path.exists(video_path) or os.path.getsize(video_path) == 0:
+        raise ValueError(f"Video missing or empty: {video_path}")
+    duration = probe_duration(video_path)
+    if not config.MIN_VIDEO_DURATION <= duration <= config.VIDEO_DURATION:
+        raise ValueError(f"Video duration {duration:.1f}s outside "
+                         f"{config.MIN_VIDEO_DURATION}-{config.VIDEO_DURATION}s: {video_path}")
+    return duration
+
+def load_buffer() -> dict:
+    """Read the pre-render manifest: finished videos plus the next topic index"""
+    path = os.path.join(config.PRERENDER_DIR, BUFFER_MANIFEST)
+    if not os.path.exists(path):
+        return {'next_topic_index': 0, 'videos': []}
+    with open(path) as f:
+        return json.load(f)
+
+def save_buffer(buffer: dict):
+    """Write the manifest atomically so a crash never leaves it half-written"""
+    os.makedirs(config.PRERENDER_DIR, exist_ok=True)
+    path = os.path.join(config.PRERENDER_DIR, BUFFER_MANIFEST)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(buffer, f, indent=2)
+    os.replace(tmp_path, path)
+
+def read_stage_samples() -> dict:
+    """Recent successful timings per stage, reading only what was appended since the last call
+
+    The metrics file grows with every span, so it is read incrementally and
+    only the last PRERENDER_ESTIMATE_SAMPLES timings per stage are kept.
+    """
+    with _estimate_lock:
+        state = _estimate_state
+        size = os.path.getsize(config.METRICS_PATH) if os.path.exists(config.METRICS_PATH) else 0
+        if state['samples'] is None or size < state['offset']:  # First call, or the file was replaced
+            state['offset'] = 0
+            state['samples'] = {
+                name: deque(maxlen=config.PRERENDER_ESTIMATE_SAMPLES) for name in STAGE_DEPENDENCIES
+            }
+        if size > state['offset']:
+            with open(config.METRICS_PATH, 'rb') as f:
+                f.seek(state['offset'])
+                data = f.read(size - state['offset'])
+            complete = data.rfind(b'\n') + 1  # Leave a partly written last line for next time
+            state['offset'] += complete
+            for line in data[:complete].splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if (record.get('type') == 'span' and record.get('name') in state['samples']
+                        and not record.get('error')):
+                    state['samples'][record['name']].append(record['seconds'])
+        return {name: list(seconds) for name, seconds in state['samples'].items()}
+
+def estimate_render_seconds() -> float:
+    """Estimate a full render from recent stage timings in the metrics file
+
+    Each stage uses the 90th percentile of its last few successful runs;
+    stages that run concurrently only count along the longest chain.
+    """
+    samples = read_stage_samples()
+    if not all(samples.values()):
+        return config.PRERENDER_DEFAULT_ESTIMATE
+
+    estimates = {}
+    for name, seconds in samples.items():
+        recent = sorted(seconds)
+        estimates[name] = recent[int(0.9 * (len(recent) - 1))]
+
+    finish = {}
+    for name in STAGE_DEPENDENCIES:  # Declared in dependency order
+        finish[name] = max((finish[dep] for dep in STAGE_DEPENDENCIES[name]), default=0.0) + estimates[name]
+    return max(finish.values())
+
+def should_prerender(buffered: int, now: datetime, next_publish: datetime, estimate: float) -> bool:
+    """Decide whether to start another render now"""
+    if buffered >= config.PRERENDER_BUFFER_SIZE:
+        return False
+    if buffered < config.PRERENDER_LOW_WATER:
+        return True
+
+    # The first publication slot without a video must have one by then
+    slot = next_publish + timedelta(days=buffered)
+    latest_start = slot - timedelta(seconds=estimate * config.PRERENDER_SAFETY_FACTOR)
+    if now >= latest_start:
+        return True
+
+    start_hour, end_hour = config.PRERENDER_IDLE_HOURS
+    return start_hour <= now.hour < end_hour
+
+def retry_allowed(buffer: dict, now: float = None) -> bool:
+    """False while pre-renders are backing off after a failure"""
+    return (now or time.time()) >= buffer.get('retry_at', 0)
+
+def _record_failure(index: int):
+    """Back off further pre-renders; move past the topic once it has failed too often"""
+    with _buffer_lock:
+        buffer = load_buffer()
+        failures = buffer.get('failures', 0) + 1
+        attempts = buffer.get('topic_attempts', 0) + 1
+        delay = min(config.PRERENDER_RETRY_SECONDS * 2 ** (failures - 1), config.PRERENDER_MAX_RETRY_SECONDS)
+        if attempts >= config.PRERENDER_MAX_ATTEMPTS and buffer['next_topic_index'] == index:
+            print(f"⏭️ Skipping topic #{index} after {attempts} failed renders")
+            buffer['next_topic_index'] = index + 1
+            attempts = 0
+        buffer.update({'failures': failures, 'topic_attempts': attempts, 'retry_at': time.time() + delay})
+        save_buffer(buffer)
+    print(f"⏳ Next pre-render in {delay / 60:.0f} min ({failures} consecutive failure(s))")
+
+def _render_next():
+    """Render and validate the next topic; returns its buffer entry or None
+
+    The topic index only advances once a render succeeds (or the topic has
+    failed PRERENDER_MAX_ATTEMPTS times); failures back off further renders.
+    """
+    with _buffer_lock:
+        index = load_buffer()['next_topic_index']
+
+    topic = TOPICS[index % len(TOPICS)]
+    output_path = os.path.abspath(os.path.join(config.PRERENDER_DIR, f"{index:05d}.mp4"))
+    print(f"⏩ Pre-rendering topic #{index}: {topic}")
+    start = time.perf_counter()
+    try:
+        video_path = render_topic(topic, output_path)
+        duration = validate_video(video_path)
+    except Exception as e:
+        print(f"❌ Pre-render of '{topic}' failed: {e}")
+        for path in (output_path, script_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        _record_failure(index)
+        return None
+
+    with _buffer_lock:
+        buffer = load_buffer()
+        buffer.update({'next_topic_index': index + 1, 'failures': 0, 'topic_attempts': 0, 'retry_at': 0})
+        save_buffer(buffer)
+
+    render_seconds = time.perf_counter() - start
+    print(f"✅ Rendered '{topic}' ({duration:.1f}s video) in {render_seconds:.0f}s")
+    return {
+        'topic': topic,
+        'video_path': video_path,
+        'duration': duration,
+        'render_seconds': render_seconds,
+        'rendered_at': time.time()
+    }
+
+def _peek_buffered():
+    """Return the oldest buffered video that still validates, leaving it in the buffer"""
+    while True:
+        with _buffer_lock:
+            buffer = load_buffer()
+            if not buffer['videos']:
+                return None
+            entry = buffer['videos'][0]
+        try:
+            validate_video(entry['video_path'])
+            return entry
+        except ValueError as e:
+            print(f"⚠️ Dropping buffered video: {e}")
+            _remove_buffered(entry)
+            if os.path.exists(script_path(entry['video_path'])):
+                os.remove(script_path(entry['video_path']))
+
+def _add_buffered(entry: dict) -> int:
+    """Append a rendered video to the buffer; returns how many are buffered"""
+    with _buffer_lock:
+        buffer = load_buffer()
+        buffer['videos'].append(entry)
+        save_buffer(buffer)
+    return len(buffer['videos'])
+
+def _remove_buffered(entry: dict):
+    """Drop a video from the buffer once it is published or unusable"""
+    with _buffer_lock:
+        buffer = load_buffer()
+        buffer['videos'] = [v for v in buffer['videos'] if v['video_path'] != entry['video_path']]
+        save_buffer(buffer)
+
+def prerender_next():
+    """Render the next topic into the buffer"""
+    with _render_lock:
+        entry = _render_next()
+        if entry is None:
+            return None
+        buffered = _add_buffered(entry)
+    print(f"📦 {buffered} video(s) ready to publish")
+    return entry
+
+def publish_next():
+    """Publish the oldest buffered video, rendering one on the spot if the buffer ran dry
+
+    The video only leaves the buffer once it is published, so a failed
+    upload is retried at the next publish time.
+    """
+    entry = _peek_buffered()
+    if entry is None:
+        # Wait for an in-flight pre-render rather than racing it
+        with _render_lock:
+            entry = _peek_buffered()
+            if entry is None:
+                print("⚠️ Pre-render buffer is empty; rendering now (publication will be late)")
+                entry = _render_next()
+                if entry is not None:
+                    _add_buffered(entry)
+        if entry is None:
+            return
+
+    print(f"Publishing scheduled video for topic: {entry['topic']}")
+    if not config.UPLOAD_TO_YOUTUBE:
+        print(f"⏭️ Skipping YouTube upload (disabled in config); video left at {entry['video_path']}")
+        _remove_buffered(entry)
+        return
+    try:
+        publish_video(entry['video_path'], entry['topic'])
+    except Exception as e:
+        print(f"❌ Publishing '{entry['topic']}' failed, keeping it buffered for the next run: {e}")
+        return
+    _remove_buffered(entry)
+
+def _keep_running(job):
+    """Wrap a scheduled job so a failure is logged instead of ending the scheduler
+
+    The failure is caught inside the job rather than around run_pending so
+    the schedule still moves on to the job's next run.
+    """
+    def run():
+        try:
+            return job()
+        except Exception as e:
+            print(f"❌ Scheduled job {job.__name__} failed: {e}")
+    run.__name__ = job.__name__
+    return run
+
 def schedule_daily_upload():
     """Schedule daily video uploads"""
-    topics = [
-        "Why bridges have expansion joints",
-        "How skyscrapers stay upright in wind",
-        "The engineering behind tunnels",
-        "Why roads crack in winter",
-        "How elevators work safely"
-    ]
-    
     topic_index = 0
-    
+
     def run_scheduled():
         nonlocal topic_index
-        topic = topics[topic_index % len(topics)]
+        topic = TOPICS[topic_index % len(TOPICS)]
         print(f"Running scheduled upload for topic: {topic}")
-        run_full_pipeline(topic)
+        if config.SCHEDULER_USE_DAEMON:
+            # The warm daemon renders it; don't block the schedule loop
+            job = submit_job(topic)
+            print(f"Submitted job {job['id']} to the render daemon")
+        else:
+            run_full_pipeline(topic)
         topic_index += 1
-    
-    # Schedule for 10 AM daily
-    schedule.every().day.at("10:00").do(run_scheduled)
-    
+
+    if config.PRERENDER_ENABLED:
+        # Publish from the buffer; renders happen ahead of time in the background
+        publish_job = schedule.every().day.at(config.PUBLISH_TIME).do(_keep_running(publish_next))
+    else:
+        # Schedule for 10 AM daily
+        schedule.every().day.at(config.PUBLISH_TIME).do(_keep_running(run_scheduled))
+    render_thread = None
+
     print("Scheduler started. Press Ctrl+C to stop.")
     try:
         while True:
             schedule.run_pending()
+            if config.PRERENDER_ENABLED and (render_thread is None or not render_thread.is_alive()):
+                with _buffer_lock:
+                    buffer = load_buffer()
+                if retry_allowed(buffer) and should_prerender(
+                    len(buffer['videos']), datetime.now(), publish_job.next_run, estimate_render_seconds()
+                ):
+                    render_thread = threading.Thread(target=prerender_next, name='prerender', daemon=True)
+                    render_thread.start()
             time.sleep(60)
     except KeyboardInterrupt:
         print("Scheduler stopped.")
@@ -1,15 +1,22 @@
-from google import genai
+import json
+import re
+
 import config
+import telemetry
+from cache import ArtifactCache, get_cache
+from gemini_client import generate_content
 
-def generate_script(topic: str) -> str:
-    """Generate a video script using the new Google Gen AI SDK"""
-    if not config.GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    
-    # Initialize the client with the correct new SDK
-    client = genai.Client(api_key=config.GEMINI_API_KEY)
-    
-    prompt = f"""
+SCRIPT_MODEL = 'gemini-2.0-flash-exp'
+
+def build_script_prompt(topic: str, avoid: str = None) -> str:
+    """Build the script prompt for a topic, optionally steering away from a past script"""
+    if avoid:
+        return build_script_prompt(topic) + f"""
+    A previous video already used this script:
+    \"\"\"{avoid}\"\"\"
+    Take a clearly different angle: a different hook, different facts and different examples.
+    """
+    return f"""
     Create a 45-50 second YouTube Shorts script about: {topic}
     
     Requirements:
@@ -23,25 +30,234 @@ def generate_script(topic: str) -> str:
     
     Format: Just return the script text, no extra formatting.
     """
+
+def build_batch_prompt(topics: list) -> str:
+    """Build one prompt asking for a script per topic, returned as JSON keyed by topic"""
+    listed = '\n'.join(f"    - {topic}" for topic in topics)
+    return f"""
+    Create a 45-50 second YouTube Shorts script for each of these topics:
+{listed}
+    
+    Requirements for every script:
+    - Hook the viewer in the first 3 seconds
+    - Make it educational and engaging
+    - Use simple language
+    - Include a surprising fact or statistic
+    - End with a call-to-action (like/subscribe)
+    - Keep it under {config.MAX_SCRIPT_LENGTH} words
+    - Write in a conversational tone
     
+    Format: a JSON object whose keys are the topics exactly as written above
+    and whose values are the plain script text.
+    """
+
+class ScriptTooLong(ValueError):
+    """A generated script is over MAX_SCRIPT_LENGTH words; keeps the script for trimming"""
+
+    def __init__(self, script: str, words: int):
+        super().__init__(f"Generated script is too long ({words} words, max {config.MAX_SCRIPT_LENGTH})")
+        self.script = script
+
+def validate_script(script: str) -> str:
+    """Check a script is usable for a Short; returns it stripped or raises ValueError"""
+    script = (script or '').strip()
+    if len(script) < 50:
+        raise ValueError("Generated script is too short")
+    words = len(script.split())
+    if words > config.MAX_SCRIPT_LENGTH:
+        raise ScriptTooLong(script, words)
+    return script
+
+def trim_script(script: str) -> str:
+    """Cut a script to MAX_SCRIPT_LENGTH words, ending on a full sentence where possible"""
+    trimmed = ' '.join(script.split()[:config.MAX_SCRIPT_LENGTH])
+    sentences = re.findall(r'.*?[.!?](?=\s|$)', trimmed, re.S)
+    if sentences:
+        trimmed = ''.join(sentences)
+    return validate_script(trimmed)
+
+def script_cache_key(topic: str) -> str:
+    return ArtifactCache.make_key('script', prompt=build_script_prompt(topic), model=SCRIPT_MODEL)
+
+def request_script(topic: str, avoid: str = None) -> str:
+    """Ask the model for one topic's script and validate it
+
+    A script over MAX_SCRIPT_LENGTH is requested once more with a stricter
+    length instruction; if that is still too long it is trimmed to the limit
+    rather than failing the run.
+    """
+    prompt = build_script_prompt(topic, avoid)
+    response = generate_content(SCRIPT_MODEL, prompt)
     try:
-        # Use the correct new SDK method
-        response = client.models.generate_content(
-            model='gemini-2.0-flash-exp',  # Updated model name
-            contents=prompt
-        )
-        
-        script = response.text.strip()
-        
-        if len(script) < 50:
-            raise ValueError("Generated script is too short")
-            
+        return validate_script(response.text)
+    except ScriptTooLong as e:
+        print(f"✂️ {e}; asking for a shorter one")
+    response = generate_content(SCRIPT_MODEL, prompt + f"""
+    The script MUST be at most {config.MAX_SCRIPT_LENGTH} words. Anything longer is rejected.
+    """)
+    try:
+        return validate_script(response.text)
+    except ScriptTooLong as e:
+        print(f"✂️ {e}; trimming to {config.MAX_SCRIPT_LENGTH} words")
+        telemetry.count('scripts.trimmed')
+        return trim_script(e.script)
+
+def request_scripts(topics: list) -> dict:
+    """Ask for several topics in one structured-output call
+
+    Returns {topic: script or ValueError}; topics missing from the reply or
+    failing validation (including over-long scripts) map to the error so they
+    are re-requested through request_script's length policy.
+    """
+    schema = {
+        'type': 'OBJECT',
+        'properties': {topic: {'type': 'STRING'} for topic in topics},
+        'required': list(topics)
+    }
+    response = generate_content(
+        SCRIPT_MODEL,
+        build_batch_prompt(topics),
+        output_tokens=config.GEMINI_OUTPUT_TOKENS * len(topics),
+        config={'response_mime_type': 'application/json', 'response_schema': schema}
+    )
+
+    try:
+        scripts = json.loads(response.text)
+    except (TypeError, ValueError):
+        scripts = {}
+    if not isinstance(scripts, dict):
+        scripts = {}
+
+    results = {}
+    for topic in topics:
+        try:
+            value = scripts.get(topic)
+            results[topic] = validate_script(value if isinstance(value, str) else '')
+        except ValueError as e:
+            results[topic] = e
+    return results
+
+def generate_scripts(topics: list, batch_size: int = None) -> dict:
+    """Generate scripts for many topics with as few model calls as possible
+
+    Cached topics are skipped, the rest are sent batch_size at a time in one
+    structured-output request each, and only topics whose script is missing
+    or invalid are re-requested individually. Returns {topic: script};
+    topics that still fail are left out.
+    """
+    if not config.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    batch_size = batch_size or config.SCRIPT_BATCH_SIZE
+    topics = list(dict.fromkeys(topics))
+
+    with telemetry.span('scripts.batch', topics=len(topics)) as attrs:
+        counters_before = telemetry.summary()['counters']
+        cache = get_cache()
+        scripts = {}
+        if cache:
+            for topic in topics:
+                cached_script = cache.get_text(script_cache_key(topic))
+                if cached_script:
+                    scripts[topic] = cached_script
+
+        pending = [topic for topic in topics if topic not in scripts]
+        failed = []
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            try:
+                results = request_scripts(chunk)
+            except Exception as e:
+                print(f"⚠️ Batched request for {len(chunk)} topics failed: {e}")
+                results = {topic: e for topic in chunk}
+            for topic, result in results.items():
+                if isinstance(result, Exception):
+                    failed.append(topic)
+                else:
+                    scripts[topic] = result
+
+        for topic in failed:
+            try:
+                scripts[topic] = request_script(topic)
+            except Exception as e:
+                print(f"❌ No script for '{topic}': {e}")
+
+        if cache:
+            for topic in pending:
+                if topic in scripts:
+                    cache.put_text(script_cache_key(topic), scripts[topic])
+
+        counters = telemetry.summary()['counters']
+        calls = counters.get('gemini.calls', 0) - counters_before.get('gemini.calls', 0)
+        tokens = counters.get('gemini.tokens', 0) - counters_before.get('gemini.tokens', 0)
+        generated = sum(1 for topic in pending if topic in scripts)
+        attrs.update({
+            'cached': len(topics) - len(pending),
+            'generated': generated,
+            'retried': len(failed),
+            'model_calls': calls,
+            'tokens': tokens,
+            'tokens_per_script': tokens / generated if generated else None
+        })
+
+    print(f"📝 Scripts: {len(scripts)}/{len(topics)} topics ({len(topics) - len(pending)} cached) "
+          f"from {calls} model calls, {len(failed)} re-requested individually"
+          + (f", {tokens / generated:.0f} tokens per script" if generated else ""))
+    return scripts
+
+def generate_script(topic: str) -> str:
+    """Generate a video script using the new Google Gen AI SDK"""
+    if not config.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    
+    # Reuse a previous script generated from the same prompt and model
+    cache = get_cache()
+    cache_key = script_cache_key(topic)
+    if cache:
+        cached_script = cache.get_text(cache_key)
+        if cached_script:
+            return cached_script
+    
+    # Failures propagate: a canned fallback would still be voiced, rendered and published
+    script = request_script(topic)
+    
+    if cache:
+        cache.put_text(cache_key, script)
+    return script
+
+def ensure_unique(topic: str, script: str) -> str:
+    """Return script, or a regenerated one, that does not repeat a past video
+
+    Runs before any TTS, image or render work. A near-duplicate is
+    regenerated with a prompt that steers away from the matching script,
+    up to DEDUP_MAX_REGENERATIONS times; then DuplicateScriptError aborts the topic.
+    A regenerated script replaces the topic's cached one, so the next run
+    doesn't start from the duplicate again.
+    """
+    from dedup import DuplicateScriptError, get_index
+
+    index = get_index()
+    if index is None:
         return script
-        
-    except Exception as e:
-        print(f"Error generating script: {e}")
-        # Fallback script
-        return f"Did you know that {topic.lower()} is more fascinating than you think? Let me explain why this matters in just 60 seconds. Like and subscribe for more amazing facts!"
+    cache = get_cache()
+    for attempt in range(config.DEDUP_MAX_REGENERATIONS + 1):
+        with telemetry.span('dedup.lookup') as attrs:
+            match = index.find(script)
+            attrs['duplicate'] = match is not None
+        if match is None:
+            if attempt and cache:
+                cache.put_text(script_cache_key(topic), script)
+            return script
+        telemetry.count('dedup.duplicates')
+        print(f"♻️ Script repeats #{match['id']} '{match['topic']}' ({match['similarity']:.0%} similar)")
+        if attempt == config.DEDUP_MAX_REGENERATIONS:
+            break
+        print("📝 Regenerating with a different angle...")
+        script = request_script(topic, avoid=match['script'])
+    if cache:
+        cache.delete_text(script_cache_key(topic))
+    raise DuplicateScriptError(
+        f"Still a near-duplicate of '{match['topic']}' after {config.DEDUP_MAX_REGENERATIONS} regenerations"
+    )
 
 # Legacy fallback function for backward compatibility
 def generate_script_legacy(topic: str) -> str:
@@ -0,0 +1,146 @@
+"""
+Structured instrumentation for the YouTube Shorts Bot.
+Timed spans and counters are written as JSON lines and aggregated into a
+per-run summary. Each pipeline run (a daemon job, a scheduled render) gets
+its own run context, so its summary and run id cover only that run.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import resource
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import config
+
+RUN_ID = uuid.uuid4().hex[:12]  # The process-wide run, used outside any run context
+
+_lock = threading.Lock()
+
+def _new_run(run_id: str = None) -> dict:
+    return {
+        'id': run_id or uuid.uuid4().hex[:12],
+        'spans': {},  # name -> {'count', 'seconds', 'max_seconds', 'errors'}
+        'counters': {}
+    }
+
+_current_run = contextvars.ContextVar('telemetry_run', default=_new_run(RUN_ID))
+
+def current_run_id() -> str:
+    return _current_run.get()['id']
+
+def start_run() -> contextvars.Token:
+    """Start a fresh run (new id, empty totals) in the current context; pass the token to end_run"""
+    return _current_run.set(_new_run())
+
+def end_run(token: contextvars.Token):
+    """Return to the run that was current before start_run"""
+    _current_run.reset(token)
+
+@contextmanager
+def run_context():
+    """Record everything inside the block under a fresh run; yields its run id"""
+    token = start_run()
+    try:
+        yield current_run_id()
+    finally:
+        end_run(token)
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is in KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def rss_mb(pid: int = None) -> float:
+    """Current resident set size of a process (default: this one), or 0.0 if unknown"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0  # Not Linux, or the process already exited
+
+def emit(record: dict):
+    """Append one JSON record to the metrics file"""
+    if not config.METRICS_ENABLED:
+        return
+    record = {'run_id': current_run_id(), 'time': time.time(), **record}
+    line = json.dumps(record, default=str)
+    with _lock:
+        os.makedirs(os.path.dirname(config.METRICS_PATH) or '.', exist_ok=True)
+        with open(config.METRICS_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+def count(name: str, amount: float = 1):
+    """Add to a named counter (bytes, cache hits, retries, ...)"""
+    counters = _current_run.get()['counters']
+    with _lock:
+        counters[name] = counters.get(name, 0) + amount
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block; the yielded dict can be filled with extra attributes"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        spans = _current_run.get()['spans']
+        with _lock:
+            total = spans.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'errors': 0})
+            total['count'] += 1
+            total['seconds'] += seconds
+            total['max_seconds'] = max(total['max_seconds'], seconds)
+            total['errors'] += error is not None
+        emit({
+            'type': 'span',
+            'name': name,
+            'seconds': seconds,
+            'thread': threading.current_thread().name,
+            'peak_rss_mb': peak_rss_mb(),
+            'error': error,
+            **attrs
+        })
+
+def traced(name: str, func):
+    """Wrap func so every call is recorded as a span"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+def summary() -> dict:
+    """Totals for the current run only"""
+    run = _current_run.get()
+    with _lock:
+        return {
+            'spans': {name: dict(total) for name, total in run['spans'].items()},
+            'counters': dict(run['counters']),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+def reset():
+    run = _current_run.get()
+    with _lock:
+        run['spans'].clear()
+        run['counters'].clear()
+
+def print_summary():
+    """Print the aggregated run summary and write it as a JSON line"""
+    data = summary()
+    emit({'type': 'summary', **data})
+
+    print(f"\n📈 Run summary ({current_run_id()})")
+    for name, total in sorted(data['spans'].items(), key=lambda item: -item[1]['seconds']):
+        errors = f", {total['errors']} failed" if total['errors'] else ''
+        print(f"   {name:<24}{total['seconds']:>8.2f}s  x{total['count']}{errors}")
+    for name, value in sorted(data['counters'].items()):
+        print(f"   {name:<24}{value:>10,.0f}")
+    print(f"   {'peak RSS':<24}{data['peak_rss_mb']:>8.1f} MB")
@@ -0,0 +1,250 @@
+"""
+Durable local upload queue for the YouTube Shorts Bot.
+Rendered videos are moved out of the temp directory and recorded in SQLite;
+a separate worker drains the queue within the daily API quota, retrying
+failures later instead of losing the render.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL UNIQUE,
+    video_path TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    last_error TEXT,
+    video_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS uploads_ready ON uploads (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS quota (
+    day TEXT PRIMARY KEY,
+    units INTEGER NOT NULL
+);
+"""
+
+def connect() -> sqlite3.Connection:
+    """Open the queue database (one connection per thread)"""
+    os.makedirs(os.path.dirname(config.UPLOAD_QUEUE_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(config.UPLOAD_QUEUE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def enqueue(video_path: str, title: str, description: str) -> dict:
+    """Move a rendered video into the queue directory and record it
+
+    Returns the queue row; a video whose content is already queued or
+    uploaded is not added twice. The row is inserted and the file moved
+    inside one transaction, so a failed move leaves no row behind and a
+    concurrent enqueue of the same video never moves it twice.
+    """
+    content_hash = file_hash(video_path)
+    os.makedirs(config.UPLOAD_QUEUE_DIR, exist_ok=True)
+    queued_path = os.path.join(config.UPLOAD_QUEUE_DIR, f"{content_hash[:16]}.mp4")
+    conn = connect()
+    try:
+        moved = False
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = conn.execute("SELECT * FROM uploads WHERE content_hash = ?", (content_hash,)).fetchone()
+            if existing:
+                conn.execute("ROLLBACK")
+                print(f"⏭️ Already queued as #{existing['id']} ({existing['status']})")
+                return dict(existing)
+
+            now = time.time()
+            conn.execute(
+                "INSERT INTO uploads (content_hash, video_path, title, description, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, queued_path, title, description, now, now)
+            )
+            shutil.move(video_path, queued_path)
+            moved = True
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            if moved:
+                shutil.move(queued_path, video_path)  # No row points at it, so put it back
+            raise
+        row = conn.execute("SELECT * FROM uploads WHERE content_hash = ?", (content_hash,)).fetchone()
+        print(f"📥 Queued for upload as #{row['id']}: {queued_path}")
+        return dict(row)
+    finally:
+        conn.close()
+
+def quota_day() -> str:
+    """YouTube quotas reset at midnight Pacific time"""
+    return datetime.now(ZoneInfo('America/Los_Angeles')).strftime('%Y-%m-%d')
+
+def quota_used(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT units FROM quota WHERE day = ?", (quota_day(),)).fetchone()
+    return row['units'] if row else 0
+
+def reserve_quota(conn: sqlite3.Connection) -> bool:
+    """Reserve the quota cost of one upload, or return False if today's budget is spent"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        used = quota_used(conn)
+        if used + config.UPLOAD_QUOTA_COST > config.YOUTUBE_DAILY_QUOTA:
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute(
+            "INSERT INTO quota (day, units) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET units = units + excluded.units",
+            (quota_day(), config.UPLOAD_QUOTA_COST)
+        )
+        conn.execute("COMMIT")
+        return True
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def claim_next(conn: sqlite3.Connection):
+    """Atomically claim the oldest upload that is due, including expired claims"""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT * FROM uploads "
+            "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+            "   OR (status = 'uploading' AND claimed_at < ?) "
+            "ORDER BY id LIMIT 1",
+            (now, now - config.UPLOAD_LEASE_SECONDS)
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE uploads SET status = 'uploading', claimed_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, row['id'])
+            )
+        conn.execute("COMMIT")
+        return dict(row) if row else None
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def mark_done(conn: sqlite3.Connection, upload_id: int, video_id: str):
+    conn.execute(
+        "UPDATE uploads SET status = 'done', video_id = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+        (video_id, time.time(), upload_id)
+    )
+
+def mark_failed(conn: sqlite3.Connection, upload: dict, error: str):
+    """Schedule a retry with exponential backoff, or give up after too many attempts"""
+    attempts = upload['attempts'] + 1
+    status = 'failed' if attempts >= config.UPLOAD_QUEUE_MAX_ATTEMPTS else 'pending'
+    next_attempt_at = time.time() + config.UPLOAD_RETRY_DELAY * (2 ** (attempts - 1))
+    conn.execute(
+        "UPDATE uploads SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+        "WHERE id = ?",
+        (status, attempts, next_attempt_at, error, time.time(), upload['id'])
+    )
+
+def drain(concurrency: int = None) -> dict:
+    """Upload everything that is due using a pool of worker threads"""
+    from upload_youtube import upload_to_youtube
+
+    summary = {'uploaded': 0, 'failed': 0, 'quota_exhausted': False}
+    if not os.path.exists('credentials/client_secrets.json') and not os.path.exists('credentials/token.pickle'):
+        print("⚠️ YouTube credentials not found. Leaving uploads queued.")
+        return summary
+    lock = threading.Lock()
+
+    def worker():
+        conn = connect()
+        try:
+            while True:
+                upload = claim_next(conn)
+                if upload is None:
+                    return
+                if not reserve_quota(conn):
+                    # Put it back untouched and stop for today
+                    conn.execute("UPDATE uploads SET status = 'pending' WHERE id = ?", (upload['id'],))
+                    with lock:
+                        summary['quota_exhausted'] = True
+                    return
+                try:
+                    response = upload_to_youtube(upload['video_path'], upload['title'], upload['description'])
+                except Exception as e:
+                    mark_failed(conn, upload, f"{type(e).__name__}: {e}")
+                    with lock:
+                        summary['failed'] += 1
+                    continue
+                mark_done(conn, upload['id'], response['id'])
+                if config.UPLOAD_QUEUE_DELETE_UPLOADED and os.path.exists(upload['video_path']):
+                    os.remove(upload['video_path'])
+                with lock:
+                    summary['uploaded'] += 1
+        finally:
+            conn.close()
+
+    threads = [
+        threading.Thread(target=worker, name=f"upload-{i}")
+        for i in range(concurrency or config.UPLOAD_QUEUE_CONCURRENCY)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"📤 Upload queue: {summary['uploaded']} uploaded, {summary['failed']} failed"
+          + (" (daily quota reached)" if summary['quota_exhausted'] else ""))
+    return summary
+
+def queue_status() -> dict:
+    """Count queued uploads by status and report today's quota use"""
+    conn = connect()
+    try:
+        counts = {row['status']: row['n'] for row in conn.execute(
+            "SELECT status, COUNT(*) AS n FROM uploads GROUP BY status"
+        )}
+        return {'counts': counts, 'quota_used': quota_used(conn), 'quota_limit': config.YOUTUBE_DAILY_QUOTA}
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drain the YouTube upload queue")
+    parser.add_argument("--concurrency", type=int, help="Parallel uploads")
+    parser.add_argument("--watch", action="store_true", help="Keep draining every UPLOAD_QUEUE_POLL_SECONDS")
+    parser.add_argument("--status", action="store_true", help="Show queue counts and quota use")
+    args = parser.parse_args()
+
+    if args.status:
+        print(queue_status())
+    elif args.watch:
+        print("Upload worker started. Press Ctrl+C to stop.")
+        try:
+            while True:
+                drain(args.concurrency)
+                time.sleep(config.UPLOAD_QUEUE_POLL_SECONDS)
+        except KeyboardInterrupt:
+            print("Upload worker stopped.")
+    else:
+        drain(args.concurrency)
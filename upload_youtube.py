@@ -1,16 +1,42 @@
+import hashlib
+import json
 import os
+import random
+import socket
+import ssl
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import httplib2
+import google_auth_httplib2
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, MediaFileUpload
 import pickle
 import config
+import telemetry
 
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+# Transport failures only; other OSErrors (e.g. the video file vanishing) are not retried
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, ConnectionError, socket.timeout, ssl.SSLError)
 
-def get_authenticated_service():
-    """Get authenticated YouTube service"""
+# One client per process, shared by every upload thread
+_credentials = None
+_service = None
+_service_lock = threading.Lock()
+
+def save_credentials(credentials):
+    """Save credentials for next run"""
+    os.makedirs('credentials', exist_ok=True)
+    with open('credentials/token.pickle', 'wb') as token:
+        pickle.dump(credentials, token)
+
+def load_credentials():
+    """Load saved credentials, refreshing them or running the OAuth flow if needed"""
     credentials = None
     
     # Load existing credentials
@@ -26,47 +52,193 @@ def get_authenticated_service():
             flow = InstalledAppFlow.from_client_secrets_file(
                 'credentials/client_secrets.json', SCOPES)
             credentials = flow.run_local_server(port=0)
+        save_credentials(credentials)
+    
+    return credentials
+
+def refresh_if_expiring(credentials):
+    """Refresh the access token before it expires rather than on a failed request"""
+    if not credentials.refresh_token or credentials.expiry is None:
+        return
+    # google-auth keeps expiry as a naive UTC datetime
+    remaining = credentials.expiry - datetime.now(timezone.utc).replace(tzinfo=None)
+    if remaining < timedelta(seconds=config.YOUTUBE_TOKEN_REFRESH_MARGIN):
+        with telemetry.span('upload.token_refresh'):
+            credentials.refresh(Request())
+        save_credentials(credentials)
+
+def get_authenticated_service():
+    """Get the process-wide authenticated YouTube service
+
+    The client is built once from the discovery document bundled with
+    google-api-python-client, so no discovery fetch happens. Each request
+    gets its own authorized Http, which makes the client safe to share
+    between threads.
+    """
+    global _credentials, _service
+    with _service_lock:
+        if _credentials is None:
+            _credentials = load_credentials()
+        refresh_if_expiring(_credentials)
+        
+        if _service is None:
+            credentials = _credentials
+            
+            def build_request(http, *args, **kwargs):
+                authorized_http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+                return HttpRequest(authorized_http, *args, **kwargs)
+            
+            with telemetry.span('upload.client_build'):
+                _service = build(
+                    'youtube', 'v3',
+                    credentials=credentials,
+                    requestBuilder=build_request,
+                    static_discovery=True,
+                    cache_discovery=False
+                )
+        return _service
+
+def build_upload_request(youtube, video_path: str, title: str, description: str):
+    """Create a chunked resumable videos.insert request"""
+    body = {
+        'snippet': {
+            'title': title,
+            'description': description,
+            'tags': ['shorts', 'ai', 'automation', 'educational'],
+            'categoryId': '27'  # Education category
+        },
+        'status': {
+            'privacyStatus': 'public'  # or 'private' for testing
+        }
+    }
+    
+    # Create media upload
+    media = MediaFileUpload(
+        video_path,
+        chunksize=config.UPLOAD_CHUNK_SIZE,
+        resumable=True,
+        mimetype='video/mp4'
+    )
+    
+    return youtube.videos().insert(
+        part=','.join(body.keys()),
+        body=body,
+        media_body=media
+    )
+
+def upload_state_path(video_path: str) -> str:
+    """Where the resumable session for a video is recorded"""
+    digest = hashlib.sha1(os.path.abspath(video_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(config.UPLOAD_STATE_DIR, f"{digest}.json")
+
+def load_upload_state(state_path: str, video_path: str):
+    """Return the saved session for this exact file, or None"""
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path) as f:
+        state = json.load(f)
+    stat = os.stat(video_path)
+    if state.get('size') != stat.st_size or state.get('mtime') != stat.st_mtime:
+        return None  # The file changed since the session was opened
+    return state
+
+def save_upload_state(state_path: str, video_path: str, uri: str, offset: int):
+    """Record the session URI and committed offset atomically"""
+    stat = os.stat(video_path)
+    state = {
+        'video_path': video_path,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'uri': uri,
+        'offset': offset,
+        'updated': time.time()
+    }
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def execute_resumable(request, video_path: str, state_path: str = None) -> dict:
+    """Send a resumable upload chunk by chunk, retrying and resuming across restarts"""
+    state_path = state_path or upload_state_path(video_path)
+    total_bytes = os.path.getsize(video_path)
+    
+    state = load_upload_state(state_path, video_path)
+    if state:
+        # next_chunk() asks the server how much it already has before sending more.
+        # _in_error_state is private to googleapiclient's HttpRequest and has no
+        # public equivalent; requirements.txt caps the version it was checked against.
+        request.resumable_uri = state['uri']
+        request._in_error_state = True
+        print(f"Resuming upload at {state['offset'] / total_bytes:.0%}")
+    
+    start = time.perf_counter()
+    first_response_seconds = None
+    start_offset = state['offset'] if state else 0
+    response = None
+    retries = 0
+    
+    while response is None:
+        error = None
+        try:
+            status, response = request.next_chunk()
+            if first_response_seconds is None:
+                first_response_seconds = time.perf_counter() - start
+                print(f"First upload response after {first_response_seconds * 1000:.0f} ms")
+            retries = 0
+            if response is None and request.resumable_uri:
+                save_upload_state(state_path, video_path, request.resumable_uri, request.resumable_progress)
+            if status:
+                elapsed = time.perf_counter() - start
+                rate = (status.resumable_progress - start_offset) / elapsed / (1024 * 1024) if elapsed else 0
+                print(f"Uploaded {status.progress():.0%} ({rate:.1f} MB/s)")
+        except HttpError as e:
+            if e.resp.status in (404, 410):
+                # The session expired; start over next time
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                raise
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = f"HTTP {e.resp.status}"
+        except RETRIABLE_EXCEPTIONS as e:
+            error = f"{type(e).__name__}: {e}"
         
-        # Save credentials for next run
-        os.makedirs('credentials', exist_ok=True)
-        with open('credentials/token.pickle', 'wb') as token:
-            pickle.dump(credentials, token)
+        if error:
+            if request.resumable_uri:
+                request._in_error_state = True  # Re-sync the offset before the next chunk (see above)
+            retries += 1
+            telemetry.count('upload.retries')
+            if retries > config.UPLOAD_MAX_RETRIES:
+                raise RuntimeError(f"Upload failed after {config.UPLOAD_MAX_RETRIES} retries: {error}")
+            delay = random.uniform(0, min(2 ** retries, 64))
+            print(f"Retriable upload error ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
+    if os.path.exists(state_path):
+        os.remove(state_path)
     
-    return build('youtube', 'v3', credentials=credentials)
+    elapsed = time.perf_counter() - start
+    sent_bytes = total_bytes - start_offset
+    telemetry.count('bytes.uploaded', sent_bytes)
+    telemetry.emit({
+        'type': 'upload',
+        'bytes': sent_bytes,
+        'seconds': elapsed,
+        'mb_per_second': sent_bytes / elapsed / (1024 * 1024) if elapsed else None,
+        'time_to_first_byte_seconds': first_response_seconds
+    })
+    return response
 
 def upload_to_youtube(video_path: str, title: str, description: str):
     """Upload video to YouTube"""
     try:
         youtube = get_authenticated_service()
-        
-        body = {
-            'snippet': {
-                'title': title,
-                'description': description,
-                'tags': ['shorts', 'ai', 'automation', 'educational'],
-                'categoryId': '27'  # Education category
-            },
-            'status': {
-                'privacyStatus': 'public'  # or 'private' for testing
-            }
-        }
-        
-        # Create media upload
-        media = MediaFileUpload(
-            video_path,
-            chunksize=-1,
-            resumable=True,
-            mimetype='video/mp4'
-        )
+        request = build_upload_request(youtube, video_path, title, description)
         
         # Execute upload
-        request = youtube.videos().insert(
-            part=','.join(body.keys()),
-            body=body,
-            media_body=media
-        )
-        
-        response = request.execute()
+        response = execute_resumable(request, video_path)
         
         print(f"Video uploaded successfully!")
         print(f"Video ID: {response['id']}")
@@ -1,5 +1,10 @@
+import functools
 import os
+import re
 import shutil
+import subprocess
+import tempfile
+import time
 import config
 
 def setup_directories():
@@ -7,21 +12,37 @@ def setup_directories():
     os.makedirs(config.TEMP_DIR, exist_ok=True)
     os.makedirs('credentials', exist_ok=True)
 
-def clean_temp_files():
-    """Clean up temporary files"""
-    temp_files = [
-        config.TEMP_AUDIO_PATH,
-        config.TEMP_IMAGE_PATH,
-        config.TEMP_VIDEO_PATH
-    ]
-    
-    for file_path in temp_files:
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"Cleaned up: {file_path}")
-            except Exception as e:
-                print(f"Error cleaning {file_path}: {e}")
+def workspace_root() -> str:
+    """Directory that holds run workspaces, on tmpfs when configured and available"""
+    if config.WORKSPACE_IN_MEMORY and os.path.isdir(config.WORKSPACE_MEMORY_DIR):
+        return os.path.join(config.WORKSPACE_MEMORY_DIR, 'shorts-bot')
+    return config.WORKSPACE_DIR
+
+class Workspace:
+    """A run's private directory for intermediate files
+
+    Every run gets a fresh uniquely named directory, so concurrent runs in
+    one checkout never share a path, and cleanup only removes that directory.
+    """
+
+    def __init__(self, prefix: str = 'run', root: str = None):
+        root = root or workspace_root()
+        os.makedirs(root, exist_ok=True)
+        self.dir = tempfile.mkdtemp(prefix=f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-", dir=root)
+        self.name = os.path.basename(self.dir)
+        self.audio_path = self.path('audio.mp3')
+        self.image_path = self.path('background.jpg')
+        self.frame_path = self.path('background.ppm')  # Prepared frame at output size
+        self.video_path = self.path('output_video.mp4')
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.dir, filename)
+
+    def cleanup(self):
+        """Remove this run's directory and nothing else"""
+        if os.path.isdir(self.dir):
+            shutil.rmtree(self.dir, ignore_errors=True)
+            print(f"Cleaned up: {self.dir}")
 
 def validate_config():
     """Validate configuration and API keys"""
@@ -43,3 +64,34 @@ def estimate_video_length(text: str, words_per_minute: int = 150) -> float:
     word_count = len(text.split())
     minutes = word_count / words_per_minute
     return minutes * 60  # Convert to seconds
+
+def available_memory_mb() -> float:
+    """Memory the kernel reports as available for new work, or None if unknown"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_ffmpeg_exe() -> str:
+    """Locate the ffmpeg binary used by moviepy (looked up once per process)"""
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+def probe_duration(media_path: str) -> float:
+    """Read a media file's duration from ffmpeg's stream info without decoding it"""
+    result = subprocess.run(
+        [get_ffmpeg_exe(), '-hide_banner', '-i', media_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    if not match:
+        raise ValueError(f"Could not read duration of {media_path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
@@ -1,58 +1,278 @@
-from moviepy.editor import *
 import config
 import os
+import shutil
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import telemetry
+from audio_prep import prepare_audio
+from captions import CaptionTrack, offset_captions, write_caption_frames
+from image_gen import fit_to_frame, is_prepared_frame, load_prepared_frame, pad_to_frame
+from utils import get_ffmpeg_exe
 
-def create_video(image_path: str, audio_path: str, output_path: str) -> str:
-    """Create a video from image and audio"""
+VIDEO_FADE_DURATION = 0.5  # seconds
+AUDIO_FADE_DURATION = 0.2  # seconds
+KEN_BURNS_PRESETS = ('zoom_in', 'zoom_out', 'pan_left', 'pan_right')
+
+# x264 settings per profile: speed preset, constant-quality CRF and keyframe interval
+ENCODING_PROFILES = {
+    'fast-draft': {'preset': 'ultrafast', 'crf': 30, 'gop_seconds': 10},
+    'balanced': {'preset': 'medium', 'crf': 23, 'gop_seconds': 4},
+    'archival': {'preset': 'slow', 'crf': 18, 'gop_seconds': 2}
+}
+CONTAINER_OVERHEAD = 0.02  # Share of a target size reserved for MP4 headers and muxing
+
+# Named output formats: frame size and how the background fills it ('crop' covers, 'pad' letterboxes)
+OUTPUT_FORMATS = {
+    'shorts': {'size': (1080, 1920), 'fit': 'crop'},
+    'square': {'size': (1080, 1080), 'fit': 'crop'},
+    'landscape': {'size': (1920, 1080), 'fit': 'pad'}
+}
+
+def target_video_bitrate(target_size_mb: float, duration: float) -> int:
+    """Video kbit/s that fills target_size_mb over duration next to the audio track"""
+    total_kbits = target_size_mb * 1024 * 1024 * 8 / 1000 * (1 - CONTAINER_OVERHEAD)
+    audio_kbps = int(config.AUDIO_BITRATE.rstrip('k'))
+    video_kbps = int(total_kbits / duration) - audio_kbps
+    if video_kbps < 100:
+        raise ValueError(f"{target_size_mb} MB is too small for {duration:.1f}s of video")
+    return video_kbps
+
+def encoding_settings(duration: float, still: bool, profile: str = None,
+                      target_size_mb: float = None) -> dict:
+    """Resolve an encoding profile (and optional target size) into x264 settings
+
+    Returns preset, threads, bitrate (None for constant quality) and the
+    remaining encoder options as ffmpeg arguments.
+    """
+    profile = profile or config.ENCODING_PROFILE
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile '{profile}', expected one of {list(ENCODING_PROFILES)}")
+    settings = ENCODING_PROFILES[profile]
+    target_size_mb = target_size_mb or config.TARGET_SIZE_MB
+
+    params = ['-g', str(int(settings['gop_seconds'] * config.VIDEO_FPS))]
+    if still:
+        params += ['-tune', 'stillimage']
+    bitrate = None
+    if target_size_mb:
+        # Cap the rate so the file lands at (not over) the target size
+        video_kbps = target_video_bitrate(target_size_mb, duration)
+        bitrate = f"{video_kbps}k"
+        params += ['-maxrate', bitrate, '-bufsize', f"{2 * video_kbps}k"]
+    else:
+        params += ['-crf', str(settings['crf'])]
+
+    return {
+        'profile': profile,
+        'preset': settings['preset'],
+        'threads': config.ENCODING_THREADS,
+        'bitrate': bitrate,
+        'params': params
+    }
+
+def x264_args(settings: dict) -> list:
+    """Encoding settings as ffmpeg command-line arguments"""
+    args = ['-c:v', 'libx264', '-preset', settings['preset']]
+    if settings['threads']:
+        args += ['-threads', str(settings['threads'])]
+    if settings['bitrate']:
+        args += ['-b:v', settings['bitrate']]
+    return args + settings['params']
+
+def record_encode(attrs: dict, output_path: str, duration: float, settings: dict, seconds: float):
+    """Add size and speed of a finished encode to its span and print them"""
+    size = os.path.getsize(output_path)
+    attrs.update({
+        'profile': settings['profile'],
+        'bytes_written': size,
+        'bytes_per_second': size / duration,
+        'speed': duration / seconds  # Seconds of video encoded per wall-clock second
+    })
+    telemetry.count('bytes.video', size)
+    print(f"🎞️ Encoded {duration:.1f}s with '{settings['profile']}' at {attrs['speed']:.1f}x realtime, "
+          f"{attrs['bytes_per_second'] / 1024:.0f} KB per second of video ({size / (1024 * 1024):.1f} MB)")
+
+def narration_path(output_path: str) -> str:
+    """Where the prepared AAC narration for a render is written (beside the output)"""
+    return os.path.splitext(output_path)[0] + '.audio.m4a'
+
+def prepare_narration(audio_path: str, output_path: str, captions: list = None) -> tuple:
+    """Prepare the narration once and move captions onto its trimmed timeline"""
+    audio = prepare_audio(audio_path, narration_path(output_path), fade=AUDIO_FADE_DURATION)
+    if captions:
+        captions = offset_captions(captions, -audio['trimmed_start'])
+    return audio, captions
+
+def resolve_output(spec: dict, profile: str = None) -> dict:
+    """Fill in an output spec: {'path', and 'format' or 'size' (w, h), 'fit', 'profile'}"""
+    resolved = dict(OUTPUT_FORMATS[spec['format']]) if spec.get('format') else {}
+    resolved.update({name: value for name, value in spec.items() if value is not None})
+    resolved.setdefault('size', (config.VIDEO_WIDTH, config.VIDEO_HEIGHT))
+    resolved.setdefault('fit', 'crop')
+    resolved.setdefault('profile', profile or config.ENCODING_PROFILE)
+    if resolved['fit'] not in ('crop', 'pad'):
+        raise ValueError(f"Unknown fit '{resolved['fit']}', expected 'crop' or 'pad'")
+    return resolved
+
+def still_input(frame_path: str) -> list:
+    """ffmpeg input arguments for a single still (looped by still_filter)"""
+    return ['-framerate', str(config.VIDEO_FPS), '-i', frame_path]
+
+def still_filter(duration: float, looped: bool = True) -> str:
+    """ffmpeg video filter for a still-image render: yuv420p, constant frame rate, fades
+
+    Stills are converted to yuv420p before they are repeated, so the decode
+    and color conversion happen once per still instead of once per frame.
+    A single still is repeated by the loop filter; concat stills (captions)
+    already carry durations and are repeated by fps.
+    """
+    fade_out_start = max(duration - VIDEO_FADE_DURATION, 0)
+    if looped:
+        repeat = f"loop=loop=-1:size=1:start=0,setpts=N/{config.VIDEO_FPS}/TB,"
+    else:
+        repeat = f"fps={config.VIDEO_FPS},"
+    return (
+        "format=yuv420p,"
+        f"{repeat}"
+        # Constant frame rate before the fades, so they apply frame by frame
+        f"fade=t=in:st=0:d={VIDEO_FADE_DURATION},"
+        f"fade=t=out:st={fade_out_start:.3f}:d={VIDEO_FADE_DURATION}"
+    )
+
+def create_video(image_path: str, audio_path: str, output_path, engine: str = None,
+                 profile: str = None, captions: list = None):
+    """Create a video from image and audio using the given (or configured) render engine
+
+    captions is an optional list of (start, end, text) shown one at a time.
+    output_path may instead be a list of output specs (see resolve_output);
+    they are all rendered in one still-engine pass and their paths returned.
+    """
+    if isinstance(output_path, (list, tuple)):
+        return create_videos(image_path, audio_path, output_path, profile=profile, captions=captions)
+    engine = engine or config.RENDER_ENGINE
+    if engine == 'still':
+        return create_video_still(image_path, audio_path, output_path, profile=profile, captions=captions)
+    if engine == 'effects':
+        return create_video_with_effects(image_path, audio_path, output_path, profile=profile, captions=captions)
+    if engine == 'stream':
+        return create_video_streaming(image_path, audio_path, output_path, profile=profile, captions=captions)
+    return create_video_moviepy(image_path, audio_path, output_path, profile=profile, captions=captions)
+
+def render_short(frame_path: str, audio_path: str, output_path: str, script: str = None,
+                 sentence_durations: list = None, image_path: str = None, work_path: str = None,
+                 engine: str = None, profile: str = None, formats: list = None) -> str:
+    """Render a finished Short, captioned from its script, and move it to output_path
+
+    The video is rendered at work_path (a scratch file, e.g. in the run's
+    workspace) and then moved. Each of formats (default
+    config.EXTRA_OUTPUT_FORMATS) is rendered in the same pass, fitted from
+    image_path (the original image) when given, and saved as
+    <output base>_<format>.mp4.
+    """
+    captions = None
+    if config.CAPTIONS_ENABLED and script:
+        from captions import build_captions
+        from utils import probe_duration
+        from voice_gen import split_sentences
+        captions = build_captions(
+            split_sentences(script), sentence_durations,
+            total_duration=probe_duration(audio_path),
+            pause=config.VOICE_SENTENCE_PAUSE if sentence_durations else 0.0
+        )
+    formats = config.EXTRA_OUTPUT_FORMATS if formats is None else formats
+    work_path = work_path or os.path.splitext(output_path)[0] + '.partial.mp4'
+    work_dir = os.path.dirname(work_path) or '.'
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if formats:
+        # Every format in one pass, fitted from the original image rather than the 9:16 frame
+        base = os.path.splitext(output_path)[0]
+        specs = [{'path': work_path}] + [
+            {'path': os.path.join(work_dir, f"video_{name}.mp4"), 'format': name} for name in formats
+        ]
+        source = image_path if image_path and os.path.exists(image_path) else frame_path
+        video_paths = create_video(source, audio_path, specs, profile=profile, captions=captions)
+        for name, path in zip(formats, video_paths[1:]):
+            shutil.move(path, f"{base}_{name}.mp4")
+            print(f"✅ {name} version: {base}_{name}.mp4")
+        video_path = video_paths[0]
+    else:
+        video_path = create_video(frame_path, audio_path, work_path, engine=engine, profile=profile,
+                                  captions=captions)
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not created at {video_path}")
+    shutil.move(video_path, output_path)  # Works across filesystems (tmpfs workspaces)
+    return output_path
+
+def create_video_moviepy(image_path: str, audio_path: str, output_path: str, profile: str = None,
+                         captions: list = None) -> str:
+    """Create a video from image and audio with moviepy's per-frame pipeline
+
+    The narration is prepared and encoded once up front; moviepy only
+    renders frames and the muxer copies the audio stream as-is.
+    """
+    from moviepy.editor import ImageClip
+    
     try:
-        # Load audio to get duration
-        audio = AudioFileClip(audio_path)
-        audio_duration = audio.duration
+        # Prepare the audio once (decode, trim, normalize, fade, AAC) to get the duration
+        with telemetry.span('render.audio_load', engine='moviepy'):
+            audio, captions = prepare_narration(audio_path, output_path, captions)
+            audio_duration = audio['duration']
         
-        # Load and prepare image
-        image = ImageClip(image_path, duration=audio_duration)
+        with telemetry.span('render.composite', engine='moviepy'):
+            # Prepared frames are already at output size: use the buffer as-is
+            if is_prepared_frame(image_path):
+                image = ImageClip(load_prepared_frame(image_path), duration=audio_duration)
+            else:
+                # Load and prepare image
+                image = ImageClip(image_path, duration=audio_duration)
+            
+                # Resize image to fit video dimensions while maintaining aspect ratio
+                image = image.resize(height=config.VIDEO_HEIGHT)
+            
+                # If image is wider than video width, crop it
+                if image.w > config.VIDEO_WIDTH:
+                    image = image.crop(
+                        x_center=image.w/2,
+                        width=config.VIDEO_WIDTH
+                    )
+            
+                # Center the image if it's narrower than video width
+                if image.w < config.VIDEO_WIDTH:
+                    image = image.on_color(
+                        size=(config.VIDEO_WIDTH, config.VIDEO_HEIGHT),
+                        color=(0, 0, 0),
+                        pos='center'
+                    )
         
-        # Resize image to fit video dimensions while maintaining aspect ratio
-        image = image.resize(height=config.VIDEO_HEIGHT)
-        
-        # If image is wider than video width, crop it
-        if image.w > config.VIDEO_WIDTH:
-            image = image.crop(
-                x_center=image.w/2,
-                width=config.VIDEO_WIDTH
-            )
-        
-        # Center the image if it's narrower than video width
-        if image.w < config.VIDEO_WIDTH:
-            image = image.on_color(
-                size=(config.VIDEO_WIDTH, config.VIDEO_HEIGHT),
-                color=(0, 0, 0),
-                pos='center'
-            )
+        if captions:
+            image = add_captions(image, captions)
         
         # Set video properties
         image = image.set_fps(config.VIDEO_FPS)
         
-        # Add fade in/out effects
-        image = image.fadein(0.5).fadeout(0.5)
-        audio = audio.fadein(0.2).fadeout(0.2)
-        
-        # Combine image and audio
-        final_video = image.set_audio(audio)
-        
-        # Write video file
-        final_video.write_videofile(
-            output_path,
-            fps=config.VIDEO_FPS,
-            codec='libx264',
-            audio_codec='aac',
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True,
-            logger=None  # Suppress moviepy logs
-        )
+        # Add fade in/out effects (the audio fades were applied during preparation)
+        final_video = image.fadein(VIDEO_FADE_DURATION).fadeout(VIDEO_FADE_DURATION)
+        
+        # Write video file (moviepy composites each frame while encoding)
+        settings = encoding_settings(audio_duration, still=True, profile=profile)
+        with telemetry.span('render.encode', engine='moviepy', seconds_of_video=audio_duration) as attrs:
+            start = time.perf_counter()
+            final_video.write_videofile(
+                output_path,
+                fps=config.VIDEO_FPS,
+                codec='libx264',
+                preset=settings['preset'],
+                threads=settings['threads'],
+                bitrate=settings['bitrate'],
+                ffmpeg_params=settings['params'],
+                audio=audio['path'],  # Muxed with -acodec copy, no re-encode
+                logger=None  # Suppress moviepy logs
+            )
+            record_encode(attrs, output_path, audio_duration, settings, time.perf_counter() - start)
         
         # Clean up
-        audio.close()
         image.close()
         final_video.close()
         
@@ -62,91 +282,496 @@ def create_video(image_path: str, audio_path: str, output_path: str) -> str:
     except Exception as e:
         print(f"Error creating video: {e}")
         raise
+    finally:
+        if os.path.exists(narration_path(output_path)):
+            os.remove(narration_path(output_path))
+
+def composite_frame(image_path: str):
+    """Fit an image to the video frame once: scale to height, then crop or pad the width"""
+    from PIL import Image
 
-def add_text_overlay(video_clip, text: str, fontsize: int = 50):
-    """Add text overlay to video (optional enhancement)"""
+    if is_prepared_frame(image_path):
+        return Image.fromarray(load_prepared_frame(image_path))
+
+    with Image.open(image_path) as img:
+        img = img.convert('RGB')
+        width = int(img.width * config.VIDEO_HEIGHT / img.height)
+        img = img.resize((width, config.VIDEO_HEIGHT), Image.Resampling.LANCZOS)
+
+    if width > config.VIDEO_WIDTH:
+        left = (width - config.VIDEO_WIDTH) // 2
+        img = img.crop((left, 0, left + config.VIDEO_WIDTH, config.VIDEO_HEIGHT))
+    elif width < config.VIDEO_WIDTH:
+        frame = Image.new('RGB', (config.VIDEO_WIDTH, config.VIDEO_HEIGHT), (0, 0, 0))
+        frame.paste(img, ((config.VIDEO_WIDTH - width) // 2, 0))
+        img = frame
+
+    return img
+
+def create_video_still(image_path: str, audio_path: str, output_path: str, profile: str = None,
+                       captions: list = None) -> str:
+    """Create a video from a static background without per-frame Python work
+
+    The frame is composited once and written uncompressed (or taken as-is
+    when it is already a prepared frame); ffmpeg decodes it once, loops it,
+    renders the fades itself and x264 encodes the repeated frames as skips. With captions,
+    each caption becomes one more still, played in turn by the concat demuxer.
+    """
+    prepared = is_prepared_frame(image_path)
+    frame_path = image_path if prepared else os.path.splitext(output_path)[0] + '_frame.ppm'
+    caption_dir = os.path.splitext(output_path)[0] + '_captions'
     try:
-        # Create text clip
-        txt_clip = TextClip(
-            text,
-            fontsize=fontsize,
-            color='white',
-            font='Arial-Bold',
-            stroke_color='black',
-            stroke_width=2
-        ).set_position(('center', 'bottom')).set_duration(video_clip.duration)
-        
-        # Composite video with text
-        final_video = CompositeVideoClip([video_clip, txt_clip])
-        return final_video
-        
+        with telemetry.span('render.audio_load', engine='still'):
+            audio, captions = prepare_narration(audio_path, output_path, captions)
+            audio_duration = audio['duration']
+        if not prepared:
+            with telemetry.span('render.composite', engine='still'):
+                composite_frame(image_path).save(frame_path)
+
+        video_input = still_input(frame_path)
+        if captions:
+            with telemetry.span('render.captions', engine='still', captions=len(captions)):
+                os.makedirs(caption_dir, exist_ok=True)
+                frame = np.asarray(load_prepared_frame(frame_path))
+                list_path = write_caption_frames(frame, CaptionTrack(captions), audio_duration, caption_dir)
+            video_input = ['-f', 'concat', '-safe', '0', '-i', list_path]
+
+        settings = encoding_settings(audio_duration, still=True, profile=profile)
+        command = [
+            get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+            *video_input,
+            '-i', audio['path'],
+            '-filter:v', still_filter(audio_duration, looped=not captions),
+            '-t', f"{audio_duration:.3f}",
+            '-r', str(config.VIDEO_FPS),
+            *x264_args(settings),
+            '-c:a', 'copy',  # Already prepared and encoded once
+            output_path
+        ]
+        with telemetry.span('render.encode', engine='still', seconds_of_video=audio_duration) as attrs:
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            record_encode(attrs, output_path, audio_duration, settings, time.perf_counter() - start)
+
+        print(f"Video created successfully: {output_path}")
+        return output_path
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error creating video: {e.stderr.decode(errors='replace').strip()}")
+        raise
     except Exception as e:
-        print(f"Error adding text overlay: {e}")
-        return video_clip
+        print(f"Error creating video: {e}")
+        raise
+    finally:
+        if not prepared and os.path.exists(frame_path):
+            os.remove(frame_path)
+        if os.path.exists(narration_path(output_path)):
+            os.remove(narration_path(output_path))
+        shutil.rmtree(caption_dir, ignore_errors=True)
+
+def create_videos(image_path: str, audio_path: str, outputs: list, profile: str = None,
+                  captions: list = None) -> list:
+    """Render several formats of the same video in one ffmpeg pass
+
+    The background is decoded once and fitted to each output size once;
+    the narration is prepared and encoded to AAC once and copied into every
+    output. One ffmpeg process reads each output's still (or caption stills)
+    and feeds its own x264 encoder, so no frame is ever resampled per frame.
+    """
+    from PIL import Image
+
+    specs = [resolve_output(spec, profile) for spec in outputs]
+    base = os.path.splitext(specs[0]['path'])[0]
+    work_paths = []
+    try:
+        with telemetry.span('render.audio_load', engine='multi'):
+            audio, captions = prepare_narration(audio_path, specs[0]['path'], captions)
+            audio_duration = audio['duration']
+
+        with telemetry.span('render.composite', engine='multi', outputs=len(specs)):
+            if is_prepared_frame(image_path):
+                source = Image.fromarray(load_prepared_frame(image_path))
+            else:
+                with Image.open(image_path) as img:
+                    source = img.convert('RGB')
+
+            inputs = []
+            for i, spec in enumerate(specs):
+                width, height = spec['size']
+                fit = fit_to_frame if spec['fit'] == 'crop' else pad_to_frame
+                frame = fit(source, width, height)
+                if captions:
+                    caption_dir = f"{base}_captions_{i}"
+                    os.makedirs(caption_dir, exist_ok=True)
+                    work_paths.append(caption_dir)
+                    # Same caption size relative to the short side of every format
+                    fontsize = round(config.CAPTION_FONT_SIZE * min(width, height)
+                                     / min(config.VIDEO_WIDTH, config.VIDEO_HEIGHT))
+                    track = CaptionTrack(captions, width, height, fontsize)
+                    list_path = write_caption_frames(np.asarray(frame), track, audio_duration, caption_dir)
+                    inputs += ['-f', 'concat', '-safe', '0', '-i', list_path]
+                else:
+                    frame_path = f"{base}_frame_{i}.ppm"
+                    frame.save(frame_path)
+                    work_paths.append(frame_path)
+                    inputs += still_input(frame_path)
+
+        command = [get_ffmpeg_exe(), '-y', '-loglevel', 'error', *inputs, '-i', audio['path']]
+        settings = []
+        for i, spec in enumerate(specs):
+            settings.append(encoding_settings(audio_duration, still=True, profile=spec['profile']))
+            command += [
+                '-map', f'{i}:v', '-map', f'{len(specs)}:a',
+                '-filter:v', still_filter(audio_duration, looped=not captions),
+                '-t', f"{audio_duration:.3f}",
+                '-r', str(config.VIDEO_FPS),
+                *x264_args(settings[i]),
+                '-c:a', 'copy',  # One prepared AAC track shared by every output
+                spec['path']
+            ]
+
+        with telemetry.span('render.encode', engine='multi', outputs=len(specs),
+                            seconds_of_video=audio_duration) as attrs:
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            seconds = time.perf_counter() - start
+            attrs['outputs'] = []
+            for spec, spec_settings in zip(specs, settings):
+                output_attrs = {'path': spec['path'], 'size': spec['size']}
+                record_encode(output_attrs, spec['path'], audio_duration, spec_settings, seconds)
+                attrs['outputs'].append(output_attrs)
+
+        print(f"Videos created successfully: {', '.join(spec['path'] for spec in specs)}")
+        return [spec['path'] for spec in specs]
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error creating videos: {e.stderr.decode(errors='replace').strip()}")
+        raise
+    finally:
+        for path in work_paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(narration_path(specs[0]['path'])):
+            os.remove(narration_path(specs[0]['path']))
+
+def add_captions(video_clip, captions: list):
+    """Draw timed captions onto a clip from pre-rasterized sprites"""
+    track = CaptionTrack(captions)
+    return video_clip.fl(lambda get_frame, t: track.apply(get_frame(t), t))
+
+def ken_burns_windows(preset: str, n_frames: int, width: int, height: int,
+                      zoom: float) -> np.ndarray:
+    """Precompute the (left, top, right, bottom) source crop window for every frame"""
+    if preset not in KEN_BURNS_PRESETS:
+        raise ValueError(f"Unknown Ken Burns preset '{preset}', expected one of {KEN_BURNS_PRESETS}")
+
+    progress = np.linspace(0.0, 1.0, max(n_frames, 1))
+    if preset == 'zoom_in':
+        scale = 1 + zoom * progress
+    elif preset == 'zoom_out':
+        scale = 1 + zoom * (1 - progress)
+    else:
+        scale = np.full_like(progress, 1 + zoom)
+
+    window_w = width / scale
+    window_h = height / scale
+    if preset == 'pan_right':
+        left = (width - window_w) * progress
+    elif preset == 'pan_left':
+        left = (width - window_w) * (1 - progress)
+    else:
+        left = (width - window_w) / 2
+    top = (height - window_h) / 2
+
+    return np.stack([left, top, left + window_w, top + window_h], axis=1)
+
+def ken_burns_clip(frame, duration: float, preset: str, zoom: float):
+    """Build a fixed-size pan/zoom clip that crops and scales from one source frame"""
+    from moviepy.editor import VideoClip
+    from PIL import Image
+
+    n_frames = int(np.ceil(duration * config.VIDEO_FPS))
+    windows = ken_burns_windows(preset, n_frames, frame.width, frame.height, zoom)
+    size = (config.VIDEO_WIDTH, config.VIDEO_HEIGHT)
+
+    def make_frame(t):
+        index = min(int(t * config.VIDEO_FPS), n_frames - 1)
+        box = tuple(windows[index])
+        return np.asarray(frame.resize(size, Image.Resampling.BILINEAR, box=box))
+
+    return VideoClip(make_frame, duration=duration)
 
 def create_video_with_effects(image_path: str, audio_path: str, output_path: str, 
-                            add_zoom: bool = True, add_text: str = None) -> str:
-    """Create video with additional effects"""
+                            add_zoom: bool = True, add_text: str = None,
+                            zoom_preset: str = None, profile: str = None,
+                            captions: list = None) -> str:
+    """Create video with additional effects
+
+    add_text shows one caption for the whole video; captions takes timed
+    (start, end, text) entries instead.
+    """
+    from moviepy.editor import ImageClip
+    
+    timed_captions = captions
     try:
-        # Load audio
-        audio = AudioFileClip(audio_path)
-        audio_duration = audio.duration
-        
-        # Load image
-        image = ImageClip(image_path, duration=audio_duration)
-        
-        # Resize and fit image
-        image = image.resize(height=config.VIDEO_HEIGHT)
-        if image.w > config.VIDEO_WIDTH:
-            image = image.crop(x_center=image.w/2, width=config.VIDEO_WIDTH)
-        elif image.w < config.VIDEO_WIDTH:
-            image = image.on_color(
-                size=(config.VIDEO_WIDTH, config.VIDEO_HEIGHT),
-                color=(0, 0, 0),
-                pos='center'
-            )
+        # Prepare the audio once; moviepy never decodes it
+        with telemetry.span('render.audio_load', engine='effects'):
+            audio, captions = prepare_narration(audio_path, output_path, captions)
+            audio_duration = audio['duration']
+        
+        # Composite the background once and keep it in memory as the source buffer
+        with telemetry.span('render.composite', engine='effects'):
+            frame = composite_frame(image_path)
         
-        # Add zoom effect if requested
+        # Add pan/zoom effect if requested
         if add_zoom and audio_duration > 5:
-            # Subtle zoom in effect
-            image = image.resize(lambda t: 1 + 0.02 * t / audio_duration)
+            image = ken_burns_clip(
+                frame,
+                audio_duration,
+                zoom_preset or config.KEN_BURNS_PRESET,
+                config.KEN_BURNS_ZOOM
+            )
+        else:
+            image = ImageClip(np.asarray(frame), duration=audio_duration)
+        
+        # Add captions if provided (before the fades, as in the other engines)
+        if add_text:
+            captions = [(0, audio_duration, add_text)]
+        if captions:
+            image = add_captions(image, captions)
         
         # Set FPS
         image = image.set_fps(config.VIDEO_FPS)
         
-        # Add fade effects
-        image = image.fadein(0.5).fadeout(0.5)
-        audio = audio.fadein(0.2).fadeout(0.2)
+        # Add fade effects (the audio fades were applied during preparation)
+        final_video = image.fadein(VIDEO_FADE_DURATION).fadeout(VIDEO_FADE_DURATION)
         
-        # Add text overlay if provided
-        if add_text:
-            image = add_text_overlay(image, add_text)
-        
-        # Combine video and audio
-        final_video = image.set_audio(audio)
-        
-        # Write video
-        final_video.write_videofile(
-            output_path,
-            fps=config.VIDEO_FPS,
-            codec='libx264',
-            audio_codec='aac',
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True,
-            logger=None
-        )
+        # Write video (Ken Burns frames move, so still-image tuning only applies without zoom)
+        settings = encoding_settings(audio_duration, still=not (add_zoom and audio_duration > 5), profile=profile)
+        with telemetry.span('render.encode', engine='effects', seconds_of_video=audio_duration) as attrs:
+            start = time.perf_counter()
+            final_video.write_videofile(
+                output_path,
+                fps=config.VIDEO_FPS,
+                codec='libx264',
+                preset=settings['preset'],
+                threads=settings['threads'],
+                bitrate=settings['bitrate'],
+                ffmpeg_params=settings['params'],
+                audio=audio['path'],  # Muxed with -acodec copy, no re-encode
+                logger=None
+            )
+            record_encode(attrs, output_path, audio_duration, settings, time.perf_counter() - start)
         
         # Cleanup
-        audio.close()
-        image.close()
         final_video.close()
         
         return output_path
         
     except Exception as e:
-        print(f"Error creating enhanced video: {e}")
-        # Fall back to basic video creation
-        return create_video(image_path, audio_path, output_path)
+        # Fall back to basic video creation, but make the lost effects visible
+        print(f"⚠️ Effects render failed ({type(e).__name__}: {e}); falling back to a plain moviepy render")
+        telemetry.count('render.effects_fallbacks')
+        return create_video_moviepy(image_path, audio_path, output_path, profile=profile, captions=timed_captions)
+    finally:
+        if os.path.exists(narration_path(output_path)):
+            os.remove(narration_path(output_path))
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Raised when a render cannot stay within its memory budget"""
+
+class FrameBuffersTooLarge(MemoryBudgetExceeded):
+    """Raised before encoding when the frame buffers alone exceed the budget"""
+
+class WindowSampler:
+    """Nearest-neighbour crop-and-scale of Ken Burns windows into preallocated buffers"""
+
+    def __init__(self, source: np.ndarray, windows: np.ndarray):
+        height, width = source.shape[:2]
+        self.source = source
+        self.windows = windows
+        self.row_buffer = np.empty_like(source)
+        # Pixel centres as fractions of the window, computed once
+        self.row_grid = (np.arange(height) + 0.5) / height
+        self.col_grid = (np.arange(width) + 0.5) / width
+        self.row_pos = np.empty(height)
+        self.col_pos = np.empty(width)
+        self.rows = np.empty(height, dtype=np.intp)
+        self.cols = np.empty(width, dtype=np.intp)
+
+    @property
+    def nbytes(self) -> int:
+        return self.row_buffer.nbytes
+
+    def sample(self, index: int, frame: np.ndarray):
+        """Fill frame with window index of the source, without allocating"""
+        left, top, right, bottom = self.windows[index]
+        np.multiply(self.row_grid, bottom - top, out=self.row_pos)
+        self.row_pos += top
+        np.multiply(self.col_grid, right - left, out=self.col_pos)
+        self.col_pos += left
+        np.copyto(self.rows, self.row_pos, casting='unsafe')
+        np.copyto(self.cols, self.col_pos, casting='unsafe')
+        # mode='clip' lets take() write straight into out instead of buffering
+        np.take(self.source, self.rows, axis=0, out=self.row_buffer, mode='clip')
+        np.take(self.row_buffer, self.cols, axis=1, out=frame, mode='clip')
+
+def _stream_frames(source: np.ndarray, audio: dict, output_path: str, track, fixed_bytes: int,
+                   profile: str, zoom_preset: str, budget_mb: float, degraded: bool) -> str:
+    """Compose every frame in one reused buffer and pipe it to ffmpeg, watching memory"""
+    duration = audio['duration']
+    fps = config.VIDEO_FPS
+    n_frames = max(int(round(duration * fps)), 1)
+    frame = np.empty((config.VIDEO_HEIGHT, config.VIDEO_WIDTH, 3), dtype=np.uint8)
+    sampler = None
+    if zoom_preset:
+        windows = ken_burns_windows(zoom_preset, n_frames, config.VIDEO_WIDTH, config.VIDEO_HEIGHT,
+                                    config.KEN_BURNS_ZOOM)
+        sampler = WindowSampler(source, windows)
+    buffers_mb = (frame.nbytes + fixed_bytes + (sampler.nbytes if sampler else 0)) / (1024 * 1024)
+    if budget_mb and buffers_mb > budget_mb:
+        raise FrameBuffersTooLarge(f"Frame buffers alone need {buffers_mb:.0f} MB of a {budget_mb:.0f} MB budget")
+
+    settings = encoding_settings(duration, still=sampler is None, profile=profile)
+    if degraded:
+        # x264's lookahead queue, B-frames and references dominate the encoder's memory
+        settings['threads'] = 1
+        settings['params'] = settings['params'] + [
+            '-x264-params', 'rc-lookahead=0:sync-lookahead=0:mbtree=0:bframes=0:ref=1'
+        ]
+    command = [
+        get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{config.VIDEO_WIDTH}x{config.VIDEO_HEIGHT}",
+        '-framerate', str(fps), '-i', 'pipe:0',
+        '-i', audio['path'],
+        '-map', '0:v', '-map', '1:a',
+        '-pix_fmt', 'yuv420p',
+        *x264_args(settings),
+        '-c:a', 'copy',
+        output_path
+    ]
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    peak_mb = 0.0
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        with telemetry.span('render.encode', engine='stream', seconds_of_video=duration, degraded=degraded) as attrs:
+            start = time.perf_counter()
+            previous = None
+            for i in range(n_frames):
+                t = i / fps
+                fade = max(min(1.0, t / VIDEO_FADE_DURATION, (duration - t) / VIDEO_FADE_DURATION), 0.0)
+                caption = track.active(t) if track else None
+                key = (i if sampler else None, fade, caption)
+                if key != previous:  # Unchanged frames are simply written again
+                    if sampler:
+                        sampler.sample(i, frame)
+                    else:
+                        np.copyto(frame, source)
+                    if caption is not None:
+                        track.draw(frame, caption)
+                    if fade < 1.0:
+                        np.multiply(frame, fade, out=frame, casting='unsafe')
+                    previous = key
+                try:
+                    process.stdin.write(frame.data)
+                except BrokenPipeError:
+                    break  # ffmpeg exited; its error is reported below
+
+                if i % fps == 0:  # Check memory once per second of video
+                    used_mb = telemetry.rss_mb() + telemetry.rss_mb(process.pid)
+                    peak_mb = max(peak_mb, used_mb)
+                    if budget_mb and used_mb > budget_mb:
+                        raise MemoryBudgetExceeded(f"Render reached {used_mb:.0f} MB of a {budget_mb:.0f} MB budget")
+
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, command, stderr=process.stderr.read())
+
+            _, python_peak = tracemalloc.get_traced_memory()
+            attrs.update({
+                'peak_rss_mb': peak_mb,  # This process plus the encoder, sampled
+                'python_peak_mb': python_peak / (1024 * 1024),  # Traced while streaming, i.e. per-frame temporaries
+                'buffers_mb': buffers_mb,
+                'budget_mb': budget_mb,
+                'encoder_threads': settings['threads']
+            })
+            record_encode(attrs, output_path, duration, settings, time.perf_counter() - start)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stderr.close()
+        if not tracing:
+            tracemalloc.stop()
+
+    budget = f" of {budget_mb:.0f} MB" if budget_mb else ""
+    print(f"🧠 Memory: peak {peak_mb:.0f} MB{budget} (Python + encoder), "
+          f"{buffers_mb:.1f} MB of frame buffers, {attrs['python_peak_mb']:.1f} MB allocated while streaming")
+    return output_path
+
+def create_video_streaming(image_path: str, audio_path: str, output_path: str, profile: str = None,
+                           captions: list = None, add_zoom: bool = True, zoom_preset: str = None,
+                           memory_budget_mb: float = None) -> str:
+    """Render within a memory budget by streaming raw frames to ffmpeg
+
+    The background stays uint8 (memory-mapped when it is a prepared frame);
+    pan/zoom, captions and fades are written in place into preallocated
+    buffers and piped to the encoder, so no per-frame arrays are allocated.
+    Memory of this process and the encoder is sampled as the render runs.
+    If the frame buffers alone exceed the budget, FrameBuffersTooLarge is
+    raised before encoding. If the render exceeds it, it is retried once
+    degraded (one encoder thread, no lookahead or B-frames, one reference
+    frame, no pan/zoom); if that also exceeds it, MemoryBudgetExceeded is
+    raised.
+    """
+    budget_mb = memory_budget_mb or config.RENDER_MEMORY_BUDGET_MB
+    try:
+        with telemetry.span('render.audio_load', engine='stream'):
+            audio, captions = prepare_narration(audio_path, output_path, captions)
+
+        with telemetry.span('render.composite', engine='stream'):
+            if is_prepared_frame(image_path):
+                source = load_prepared_frame(image_path)  # Memory-mapped: pages are shared, not copied
+                fixed_bytes = 0
+            else:
+                source = np.asarray(composite_frame(image_path))
+                fixed_bytes = source.nbytes
+            track = CaptionTrack(captions) if captions else None
+            if track:
+                fixed_bytes += track.prepare()
+
+        zoom_preset = (zoom_preset or config.KEN_BURNS_PRESET) if add_zoom and audio['duration'] > 5 else None
+        try:
+            return _stream_frames(source, audio, output_path, track, fixed_bytes, profile,
+                                  zoom_preset, budget_mb, degraded=False)
+        except FrameBuffersTooLarge:
+            raise  # A leaner encoder can't shrink the frames; fail now
+        except MemoryBudgetExceeded as e:
+            print(f"⚠️ {e}; retrying with a lean encoder (one thread, no lookahead or B-frames, one reference) and no pan/zoom")
+            telemetry.count('render.memory_degraded')
+            return _stream_frames(source, audio, output_path, track, fixed_bytes, profile,
+                                  None, budget_mb, degraded=True)
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error creating video: {e.stderr.decode(errors='replace').strip()}")
+        raise
+    except MemoryBudgetExceeded as e:
+        print(f"❌ {e}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        if os.path.exists(narration_path(output_path)):
+            os.remove(narration_path(output_path))
 
 if __name__ == "__main__":
     # Test video creation
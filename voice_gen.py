@@ -1,19 +1,42 @@
-from gtts import gTTS
+import contextvars
 import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import config
+import telemetry
+from cache import ArtifactCache, get_cache
+from utils import get_ffmpeg_exe, probe_duration
 
-def generate_voice(text: str, output_path: str) -> str:
-    """Convert text to speech using Google TTS"""
-    try:
-        # Create TTS object
+def _synthesize_gtts(text: str, output_path: str):
+    """Synthesize text to an MP3 file with gTTS"""
+    from gtts import gTTS
+    
+    with telemetry.span('tts.synthesize', engine='gtts', chars=len(text)) as attrs:
         tts = gTTS(
             text=text,
             lang=config.VOICE_LANGUAGE,
             slow=False
         )
-        
-        # Save audio file
         tts.save(output_path)
+        attrs['bytes_written'] = os.path.getsize(output_path)
+    telemetry.count('bytes.tts', attrs['bytes_written'])
+
+def generate_voice(text: str, output_path: str) -> str:
+    """Convert text to speech using Google TTS"""
+    if config.VOICE_SEGMENTED:
+        return generate_voice_segmented(text, output_path)[0]
+    
+    try:
+        cache = get_cache()
+        if cache:
+            cache_key = ArtifactCache.make_key(
+                'voice', text=text, engine='gtts', lang=config.VOICE_LANGUAGE, slow=False
+            )
+            cache.fetch_file(cache_key, output_path, lambda path: _synthesize_gtts(text, path), '.mp3')
+        else:
+            _synthesize_gtts(text, output_path)
         
         if not os.path.exists(output_path):
             raise FileNotFoundError(f"Failed to create audio file at {output_path}")
@@ -24,6 +47,85 @@ def generate_voice(text: str, output_path: str) -> str:
         print(f"Error generating voice: {e}")
         raise
 
+def split_sentences(text: str) -> list:
+    """Split a script into sentences on terminal punctuation"""
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+
+def generate_voice_segmented(text: str, output_path: str, synthesize=None, engine: str = None,
+                             pause: float = None, max_workers: int = None) -> tuple:
+    """Synthesize each sentence concurrently and join them into one track
+
+    Segments are cached by their own text and voice settings, so editing one
+    sentence only re-synthesizes that sentence. synthesize(text, path) can be
+    swapped for another backend (e.g. a local fake), named by engine in the
+    cache keys. Returns (output_path, durations) where durations[i] is the
+    length of sentence i; every sentence but the last is followed by `pause`
+    seconds of silence.
+    """
+    if synthesize is None:
+        synthesize, engine = _synthesize_gtts, 'gtts'
+    elif not engine:
+        raise ValueError("A custom synthesize backend needs an engine name for its cached segments")
+    pause = config.VOICE_SENTENCE_PAUSE if pause is None else pause
+    sentences = split_sentences(text)
+    if not sentences:
+        raise ValueError("Script has no sentences to synthesize")
+    
+    cache = get_cache()
+    output_dir = os.path.dirname(output_path) or '.'
+    
+    try:
+        with tempfile.TemporaryDirectory(dir=output_dir) as segment_dir:
+            def synthesize_segment(item):
+                index, sentence = item
+                segment_path = os.path.join(segment_dir, f"{index:03d}.mp3")
+                if cache:
+                    cache_key = ArtifactCache.make_key(
+                        'voice_segment', text=sentence, engine=engine,
+                        lang=config.VOICE_LANGUAGE, slow=False
+                    )
+                    cache.fetch_file(cache_key, segment_path, lambda path: synthesize(sentence, path), '.mp3')
+                else:
+                    synthesize(sentence, segment_path)
+                return segment_path
+            
+            with ThreadPoolExecutor(max_workers=max_workers or config.VOICE_MAX_WORKERS) as pool:
+                # Copy the context so segment counters land in the caller's telemetry run
+                futures = [pool.submit(contextvars.copy_context().run, synthesize_segment, item)
+                           for item in enumerate(sentences)]
+                segment_paths = [future.result() for future in futures]
+            
+            durations = [probe_duration(path) for path in segment_paths]
+            concatenate_segments(segment_paths, output_path, pause)
+        
+        return output_path, durations
+        
+    except Exception as e:
+        print(f"Error generating segmented voice: {e}")
+        raise
+
+def concatenate_segments(segment_paths: list, output_path: str, pause: float):
+    """Join audio segments into one gapless track with a pause between them"""
+    inputs = []
+    filters = []
+    for i, path in enumerate(segment_paths):
+        inputs += ['-i', path]
+        pad = f",apad=pad_dur={pause}" if pause > 0 and i < len(segment_paths) - 1 else ''
+        filters.append(f"[{i}:a]aresample=24000,aformat=channel_layouts=mono{pad}[a{i}]")
+    joined = ''.join(f"[a{i}]" for i in range(len(segment_paths)))
+    filters.append(f"{joined}concat=n={len(segment_paths)}:v=0:a=1[out]")
+    
+    command = [
+        get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        *inputs,
+        '-filter_complex', ';'.join(filters),
+        '-map', '[out]',
+        '-c:a', 'libmp3lame', '-b:a', config.AUDIO_BITRATE,
+        output_path
+    ]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return output_path
+
 def generate_voice_pyttsx3(text: str, output_path: str) -> str:
     """Alternative TTS using pyttsx3 (offline)"""
     import pyttsx3